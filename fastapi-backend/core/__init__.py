@@ -1,6 +1,11 @@
 """Core package - Utilities, database, and shared components."""
 
-from core.db import get_db_connection
+from core.db import (
+    fetch_latest_context,
+    get_db_connection,
+    invalidate_latest_context,
+    put_db_connection,
+)
 from core.schemas import (
     HealthCheckResponse,
     MovieRecommendRequest,
@@ -10,7 +15,10 @@ from core.schemas import (
 )
 
 __all__ = [
+    "fetch_latest_context",
     "get_db_connection",
+    "invalidate_latest_context",
+    "put_db_connection",
     "HealthCheckResponse",
     "MovieRecommendRequest",
     "MovieRecommendResponse",
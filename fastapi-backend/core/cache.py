@@ -0,0 +1,66 @@
+"""
+In-process caches shared by routes and services.
+
+Entries live per worker process; nothing here is shared across uvicorn workers.
+"""
+
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Hashable
+
+
+class TTLCache:
+    """
+    Bounded cache whose entries expire after a fixed time-to-live.
+
+    When the cache is full, the oldest inserted entry is dropped.
+    Safe to use from both the event loop and threadpool workers.
+    """
+
+    def __init__(self, maxsize: int, ttl: float) -> None:
+        """
+        Initialize TTL cache.
+
+        Args:
+            maxsize: Maximum number of entries to keep.
+            ttl: Seconds an entry stays valid after being set.
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable) -> Any | None:
+        """Return the cached value, or None if missing or expired."""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at < time.monotonic():
+                del self._data[key]
+                return None
+            return value
+
+    def set(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the oldest entry if over capacity."""
+        with self._lock:
+            self._data.pop(key, None)
+            self._data[key] = (time.monotonic() + self.ttl, value)
+            if len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable) -> None:
+        """Remove an entry if present."""
+        with self._lock:
+            self._data.pop(key, None)
+
+    def clear(self) -> None:
+        """Remove all entries."""
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        """Return number of entries (including not-yet-purged expired ones)."""
+        return len(self._data)
@@ -5,22 +5,33 @@ This module provides dependencies for accessing the loaded recommenders
 via FastAPI's dependency injection system.
 """
 
-from typing import TypedDict
+from dataclasses import dataclass
 
 from fastapi import Request
 
+from services.batcher import AsyncBatcher
+from services.contextual_bandit import HierarchicalBandit
+from services.emotion_detector import EmotionDetector
 from services.movie_recommender import MovieRecommender
 from services.song_recommender import SongRecommender
+from services.stress_detector import StressDetector
 
 
-class Recommenders(TypedDict):
-    """Type definition for the recommenders state."""
+@dataclass(slots=True)
+class Recommenders:
+    """Loaded models, stored on app.state.recommenders. None if not loaded."""
 
-    movie: MovieRecommender | None
-    song: SongRecommender | None
+    movie: MovieRecommender | None = None
+    song: SongRecommender | None = None
+    stress: StressDetector | None = None
+    emotion: EmotionDetector | None = None
+    bandit: HierarchicalBandit | None = None
+    # Coalesce concurrent /analyze/text calls into batched forward passes
+    stress_batcher: AsyncBatcher | None = None
+    emotion_batcher: AsyncBatcher | None = None
 
 
-def get_movie_recommender(request: Request) -> MovieRecommender:
+async def get_movie_recommender(request: Request) -> MovieRecommender:
     """
     Dependency to get the movie recommender from app state.
 
@@ -28,18 +39,13 @@ def get_movie_recommender(request: Request) -> MovieRecommender:
         request: FastAPI request object
 
     Returns:
-        MovieRecommender instance
-
-    Raises:
-        RuntimeError: If movie recommender is not loaded
+        MovieRecommender instance. If it failed to load, startup has already
+        routed /movies to a 503 handler, so this is never reached.
     """
-    recommenders: Recommenders = request.app.state.recommenders
-    if recommenders["movie"] is None:
-        raise RuntimeError("Movie recommender not loaded. Check server startup logs.")
-    return recommenders["movie"]
+    return request.app.state.recommenders.movie
 
 
-def get_song_recommender(request: Request) -> SongRecommender:
+async def get_song_recommender(request: Request) -> SongRecommender:
     """
     Dependency to get the song recommender from app state.
 
@@ -47,12 +53,7 @@ def get_song_recommender(request: Request) -> SongRecommender:
         request: FastAPI request object
 
     Returns:
-        SongRecommender instance
-
-    Raises:
-        RuntimeError: If song recommender is not loaded
+        SongRecommender instance. If it failed to load, startup has already
+        routed /songs to a 503 handler, so this is never reached.
     """
-    recommenders: Recommenders = request.app.state.recommenders
-    if recommenders["song"] is None:
-        raise RuntimeError("Song recommender not loaded. Check server startup logs.")
-    return recommenders["song"]
+    return request.app.state.recommenders.song
@@ -0,0 +1,23 @@
+"""
+Environment loading shared by the app entrypoint, core and services.
+
+The project .env is parsed once per process; later load_env() calls
+(and subprocesses that inherit the environment) skip it.
+"""
+
+import os
+from pathlib import Path
+
+from dotenv import load_dotenv
+
+# core/ -> fastapi-backend/ -> project_root/
+PROJECT_ROOT = Path(__file__).resolve().parents[2]
+ENV_FILE = PROJECT_ROOT / ".env"
+
+
+def load_env() -> None:
+    """Load the project .env into os.environ unless already done."""
+    if os.environ.get("_ENV_LOADED"):
+        return
+    load_dotenv(ENV_FILE, override=False)
+    os.environ["_ENV_LOADED"] = "1"
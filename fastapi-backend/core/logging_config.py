@@ -0,0 +1,45 @@
+"""
+Logging setup for the backend.
+
+Records are pushed onto an in-memory queue by the calling thread and written
+to stderr by a background listener thread, so request handlers never block
+on console I/O.
+"""
+
+import logging
+import os
+import queue
+import sys
+from logging.handlers import QueueHandler, QueueListener
+
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = "%(asctime)s %(levelname)s %(name)s: %(message)s"
+
+_LISTENER: QueueListener | None = None
+
+
+def setup_logging() -> None:
+    """Route the root logger through a QueueHandler. Safe to call twice."""
+    global _LISTENER
+    if _LISTENER is not None:
+        return
+
+    log_queue: queue.SimpleQueue[logging.LogRecord] = queue.SimpleQueue()
+
+    stream_handler = logging.StreamHandler(sys.stderr)
+    stream_handler.setFormatter(logging.Formatter(LOG_FORMAT))
+
+    root = logging.getLogger()
+    root.setLevel(LOG_LEVEL)
+    root.addHandler(QueueHandler(log_queue))
+
+    _LISTENER = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _LISTENER.start()
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread."""
+    global _LISTENER
+    if _LISTENER is not None:
+        _LISTENER.stop()
+        _LISTENER = None
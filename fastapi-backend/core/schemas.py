@@ -5,18 +5,62 @@ This module defines all the data models used for API request/response
 validation and serialization.
 """
 
+from types import MappingProxyType
 from typing import Optional
 
 from pydantic import BaseModel, Field, ConfigDict
 from pydantic.alias_generators import to_camel
 
 
+# Fixed order of EmotionResult.probabilities
+EMOTION_LABELS: tuple[str, ...] = (
+    "anger",
+    "fear",
+    "joy",
+    "love",
+    "neutral",
+    "sadness",
+    "surprise",
+)
+
+# Fallback when the emotion model is missing or fails; read-only and shared
+DEFAULT_EMOTION_RESULT = MappingProxyType(
+    {
+        "emotion": "neutral",
+        "confidence": 0.5,
+        # In EMOTION_LABELS order
+        "probabilities": (0.1, 0.1, 0.1, 0.1, 0.5, 0.05, 0.05),
+    }
+)
+
+
+class CamelModel(BaseModel):
+    """
+    Base for models that accept camelCase keys from the Nuxt server.
+
+    Aliases are generated once when the subclass is defined, not per request.
+    """
+
+    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
+
+
+class HotModel(BaseModel):
+    """
+    Base for models built on every recommendation request.
+
+    Frozen and closed to unknown fields, which gives Pydantic a tighter
+    core schema with no assignment validation.
+    """
+
+    model_config = ConfigDict(frozen=True, extra="forbid")
+
+
 # =============================================================================
 # Movie Schemas
 # =============================================================================
 
 
-class MovieBase(BaseModel):
+class MovieBase(HotModel):
     """Base movie schema with common fields."""
 
     movie_id: int = Field(..., description="MovieLens movieId")
@@ -40,7 +84,7 @@ class MovieRecommendation(MovieInfo):
     score: float = Field(..., description="Recommendation score (higher is better)")
 
 
-class MovieRecommendRequest(BaseModel):
+class MovieRecommendRequest(HotModel):
     """Request model for movie recommendations."""
 
     liked_movie_ids: list[int] = Field(
@@ -59,9 +103,13 @@ class MovieRecommendRequest(BaseModel):
         default=True,
         description="Whether to exclude liked movies from recommendations",
     )
+    stream: bool = Field(
+        default=False,
+        description="Stream recommendations as NDJSON instead of one JSON body",
+    )
 
 
-class MovieRecommendResponse(BaseModel):
+class MovieRecommendResponse(HotModel):
     """Response model for movie recommendations."""
 
     recommendations: list[MovieRecommendation]
@@ -75,6 +123,9 @@ class MovieSearchRequest(BaseModel):
     limit: int = Field(
         default=10, ge=1, le=100, description="Maximum number of results"
     )
+    stream: bool = Field(
+        default=False, description="Stream results as NDJSON instead of one JSON body"
+    )
 
 
 class MovieSearchResponse(BaseModel):
@@ -89,7 +140,7 @@ class MovieSearchResponse(BaseModel):
 # =============================================================================
 
 
-class SongBase(BaseModel):
+class SongBase(HotModel):
     """Base song schema with common fields."""
 
     spotify_id: str = Field(..., description="Spotify track ID")
@@ -139,7 +190,7 @@ class SongRecommendation(SongInfo):
     )
 
 
-class SongRecommendRequest(BaseModel):
+class SongRecommendRequest(HotModel):
     """Request model for song recommendations based on liked songs."""
 
     liked_song_ids: list[str] = Field(
@@ -160,7 +211,7 @@ class SongRecommendRequest(BaseModel):
     )
 
 
-class SongRecommendByIdRequest(BaseModel):
+class SongRecommendByIdRequest(HotModel):
     """Request model for song recommendations based on a single song."""
 
     spotify_id: str = Field(..., description="Spotify track ID")
@@ -172,7 +223,7 @@ class SongRecommendByIdRequest(BaseModel):
     )
 
 
-class SongRecommendResponse(BaseModel):
+class SongRecommendResponse(HotModel):
     """Response model for song recommendations."""
 
     recommendations: list[SongRecommendation]
@@ -216,7 +267,7 @@ class TextAnalysisRequest(BaseModel):
     )
 
 
-class EmotionResult(BaseModel):
+class EmotionResult(HotModel):
     """Emotion detection result."""
 
     emotion: str = Field(
@@ -229,11 +280,18 @@ class EmotionResult(BaseModel):
         le=1,
         description="Confidence score for the prediction",
     )
-    probabilities: dict[str, float] = Field(
+    probabilities: list[float] = Field(
         ...,
-        description="Probability distribution across all emotions",
+        min_length=len(EMOTION_LABELS),
+        max_length=len(EMOTION_LABELS),
+        description="Score per emotion, in EMOTION_LABELS order",
     )
 
+    @property
+    def probabilities_dict(self) -> dict[str, float]:
+        """Probabilities keyed by emotion label."""
+        return dict(zip(EMOTION_LABELS, self.probabilities))
+
 
 class TextAnalysisResponse(BaseModel):
     """Response model for text analysis."""
@@ -309,7 +367,7 @@ class HealthCheckResponse(BaseModel):
 # =============================================================================
 
 
-class RecommendRequest(BaseModel):
+class RecommendRequest(HotModel):
     """Request model for unified recommendation endpoint."""
 
     user_id: str = Field(..., description="User ID")
@@ -320,7 +378,7 @@ class RecommendRequest(BaseModel):
     )
 
 
-class RecommendedContent(BaseModel):
+class RecommendedContent(HotModel):
     """Recommended content (either song or movie)."""
 
     type: str = Field(..., description="Content type: 'song' or 'movie'")
@@ -341,7 +399,7 @@ class RecommendedContent(BaseModel):
     year: Optional[int] = Field(None, description="Release year")
 
 
-class RecommendResponse(BaseModel):
+class RecommendResponse(HotModel):
     """Response model for unified recommendation endpoint."""
 
     content: RecommendedContent = Field(..., description="Recommended content")
@@ -350,11 +408,9 @@ class RecommendResponse(BaseModel):
     bandit_score: float = Field(..., ge=0, description="Bandit confidence score")
 
 
-class RecommendFeedbackRequest(BaseModel):
+class RecommendFeedbackRequest(CamelModel):
     """Request model for recommendation feedback."""
 
-    model_config = ConfigDict(alias_generator=to_camel, populate_by_name=True)
-
     user_id: str = Field(..., description="User ID")
     content_type: str = Field(..., description="Content type: 'song' or 'movie'")
     content_id: str = Field(..., description="Content ID")
@@ -6,29 +6,41 @@ Models are loaded on startup using FastAPI's lifespan events.
 Run with: uvicorn main:app --reload
 """
 
+import asyncio
+import logging
 import os
-import traceback
+from concurrent.futures import ThreadPoolExecutor
 from contextlib import asynccontextmanager
-from pathlib import Path
 from typing import AsyncGenerator
 
-from dotenv import load_dotenv
-from fastapi import FastAPI
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
+from starlette.routing import Route
 
-ENV_FILE = Path(__file__).parent.parent / ".env"
-load_dotenv(ENV_FILE)
+from core.env import load_env
+
+load_env()
 
 from routes.movies import router as movies_router  # noqa: E402
 from routes.songs import router as songs_router  # noqa: E402
 from routes.stress import router as analyze_router  # noqa: E402
 from routes.recommend import router as recommend_router  # noqa: E402
+from core.db import (  # noqa: E402
+    close_db_pool,
+    create_async_pool,
+    get_db_connection,
+    put_db_connection,
+)
+from core.dependencies import Recommenders  # noqa: E402
+from core.logging_config import setup_logging, stop_logging  # noqa: E402
 from core.schemas import HealthCheckResponse  # noqa: E402
 from services.movie_recommender import MovieRecommender  # noqa: E402
 from services.song_recommender import SongRecommender  # noqa: E402
 from services.stress_detector import StressDetector  # noqa: E402
 from services.emotion_detector import EmotionDetector  # noqa: E402
 from services.contextual_bandit import HierarchicalBandit  # noqa: E402
+from services.batcher import AsyncBatcher  # noqa: E402
 
 
 # =============================================================================
@@ -53,27 +65,119 @@ A recommendation API for movies and songs using machine learning models.
 - **Song Recommender**: Content-based filtering using audio features, stored in pgvector
 """
 
-# CORS configuration
-CORS_ORIGINS = os.getenv("CORS_ORIGINS", "*").split(",")
+# Logging goes through a background queue listener; see core/logging_config.py
+setup_logging()
+logger = logging.getLogger("main")
+
+# CORS configuration (parsed once; "*" is short-circuited by CORSMiddleware).
+# An empty value allows no cross-origin requests.
+CORS_ORIGINS = [
+    origin.strip()
+    for origin in os.getenv("CORS_ORIGINS", "*").split(",")
+    if origin.strip()
+]
 
 
 # =============================================================================
-# Model State
+# Lifespan Events
 # =============================================================================
 
 
-class AppState:
-    """Application state container for recommenders."""
+def _register_model(app: FastAPI, key: str, label: str, result: object) -> bool:
+    """
+    Store a loaded model on app state, or log why it failed to load.
 
-    movie_recommender: MovieRecommender | None = None
-    song_recommender: SongRecommender | None = None
-    movie_model_loaded: bool = False
-    song_model_loaded: bool = False
+    Args:
+        app: FastAPI application
+        key: Field of app.state.recommenders (e.g. "movie")
+        label: Human-readable model name for log messages
+        result: Loaded model, or the exception raised while loading it
 
+    Returns:
+        True if the model was registered
+    """
+    if isinstance(result, FileNotFoundError):
+        logger.warning("⚠️  %s model files not found: %s", label, result)
+        logger.info("   %s will be unavailable.", label)
+        return False
+    if isinstance(result, BaseException):
+        logger.error("❌ Error loading %s: %s", label, result, exc_info=result)
+        return False
 
-# =============================================================================
-# Lifespan Events
-# =============================================================================
+    setattr(app.state.recommenders, key, result)
+    app.state.model_status[f"{key}_loaded"] = True
+    logger.info("✅ %s loaded successfully!", label)
+    return True
+
+
+def _disable_routes(app: FastAPI, prefix: str, label: str) -> None:
+    """
+    Answer every request under a router prefix with 503.
+
+    Used when the model behind a router failed to load, so its dependencies
+    never have to check for a missing model per request.
+
+    Args:
+        app: FastAPI application
+        prefix: Router prefix (e.g. "/movies")
+        label: Human-readable model name for the error detail
+    """
+    name = f"{prefix.strip('/')}_unavailable"
+    if any(getattr(route, "name", None) == name for route in app.router.routes):
+        return
+
+    async def unavailable(request: Request) -> ORJSONResponse:
+        return ORJSONResponse(
+            {"detail": f"{label} not loaded. Check server startup logs."},
+            status_code=503,
+        )
+
+    # Matched ahead of the real router, which stays registered for the docs
+    app.router.routes.insert(
+        0,
+        Route(
+            f"{prefix}/{{path:path}}",
+            unavailable,
+            methods=["GET", "POST", "PUT", "PATCH", "DELETE"],
+            name=name,
+            include_in_schema=False,
+        ),
+    )
+    logger.warning("⚠️  %s routes will return 503.", prefix)
+
+
+async def _warm_up(app: FastAPI) -> None:
+    """
+    Pay first-use costs before the first request instead of during it.
+
+    Runs a trivial query on every idle asyncpg connection, opens the sync
+    psycopg2 pool (created lazily otherwise) and sends one dummy input through
+    each text model. Failures are logged; warm-up never blocks startup.
+
+    Args:
+        app: FastAPI application with models and pools already set up
+    """
+
+    pool = app.state.db_pool
+
+    async def ping() -> None:
+        async with pool.acquire() as conn:
+            await conn.execute("SELECT 1")
+
+    def open_sync_pool() -> None:
+        put_db_connection(get_db_connection())
+
+    tasks = [asyncio.to_thread(open_sync_pool)]
+    if pool is not None:
+        tasks += [ping() for _ in range(pool.get_min_size())]
+    recommenders: Recommenders = app.state.recommenders
+    for detector in (recommenders.stress, recommenders.emotion):
+        if detector is not None:
+            tasks.append(asyncio.to_thread(detector.predict, "warmup"))
+
+    for result in await asyncio.gather(*tasks, return_exceptions=True):
+        if isinstance(result, BaseException):
+            logger.warning("⚠️  Warm-up step failed: %s", result)
 
 
 @asynccontextmanager
@@ -84,18 +188,12 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
     On startup: Load movie and song recommendation models.
     On shutdown: Clean up resources.
     """
-    print("=" * 60)
-    print(f"🚀 Starting {API_TITLE} v{API_VERSION}")
-    print("=" * 60)
+    logger.info("=" * 60)
+    logger.info("🚀 Starting %s v%s", API_TITLE, API_VERSION)
+    logger.info("=" * 60)
 
     # Initialize state
-    app.state.recommenders = {
-        "movie": None,
-        "song": None,
-        "stress": None,
-        "emotion": None,
-        "bandit": None,
-    }
+    app.state.recommenders = Recommenders()
     app.state.model_status = {
         "movie_loaded": False,
         "song_loaded": False,
@@ -104,118 +202,103 @@ async def lifespan(app: FastAPI) -> AsyncGenerator[None, None]:
         "bandit_loaded": False,
     }
 
-    # Load movie recommender
-    print("\n📽️  Loading Movie Recommender...")
+    # Open async database pool before any request is served
+    logger.info("🗄️  Opening database connection pool...")
+    app.state.db_pool = None
     try:
-        movie_recommender = MovieRecommender()
-        app.state.recommenders["movie"] = movie_recommender  # type: ignore[assignment]
-        app.state.model_status["movie_loaded"] = True  # type: ignore[assignment]
-        print("✅ Movie Recommender loaded successfully!")
-    except FileNotFoundError as e:
-        print(f"⚠️  Movie model files not found: {e}")
-        print("   Movie recommendations will be unavailable.")
-    except Exception as e:
-        print(f"❌ Error loading Movie Recommender: {e}")
-        traceback.print_exc()
-
-    # Load song recommender
-    print("\n🎵 Loading Song Recommender...")
-    try:
-        song_recommender = SongRecommender()
-        app.state.recommenders["song"] = song_recommender  # type: ignore[assignment]
-        app.state.model_status["song_loaded"] = True  # type: ignore[assignment]
-        print("✅ Song Recommender loaded successfully!")
-    except FileNotFoundError as e:
-        print(f"⚠️  Song model files not found: {e}")
-        print("   Song recommendations will be unavailable.")
-    except Exception as e:
-        print(f"❌ Error loading Song Recommender: {e}")
-        print("   This may be due to database connection issues.")
-        traceback.print_exc()
-
-    # Load stress detector
-    print("\n🧠  Loading Stress Detector...")
-    try:
-        stress_detector = StressDetector()
-        app.state.recommenders["stress"] = stress_detector  # type: ignore[assignment]
-        app.state.model_status["stress_loaded"] = True  # type: ignore[assignment]
-        print("✅ Stress Detector loaded successfully!")
-    except FileNotFoundError as e:
-        print(f"⚠️  Stress model files not found: {e}")
-        print("   Stress detection will be unavailable.")
-    except Exception as e:
-        print(f"❌ Error loading Stress Detector: {e}")
-        traceback.print_exc()
-
-    # Load emotion detector
-    print("\n💭 Loading Emotion Detector...")
-    try:
-        emotion_detector = EmotionDetector(use_mock=False)
-        app.state.recommenders["emotion"] = emotion_detector  # type: ignore[assignment]
-        app.state.model_status["emotion_loaded"] = True  # type: ignore[assignment]
-        print("✅ Emotion Detector loaded successfully!")
-    except Exception as e:
-        print(f"⚠️  Error loading real Emotion Detector: {e}")
-        print("   Falling back to MOCK Emotion Detector.")
+        app.state.db_pool = await create_async_pool()
+        logger.info("✅ Database connection pool ready!")
+    except Exception:
+        logger.exception("❌ Error opening database connection pool")
+        logger.info("   /recommend routes will return 503.")
+
+    # Bound the worker threads used by asyncio.to_thread (model loading and
+    # per-request inference offload)
+    asyncio.get_running_loop().set_default_executor(
+        ThreadPoolExecutor(max_workers=min(32, (os.cpu_count() or 1) * 2))
+    )
+
+    # Load all models concurrently; startup takes as long as the slowest one
+    logger.info("📦 Loading models...")
+    movie, song, stress, emotion, bandit = await asyncio.gather(
+        asyncio.to_thread(MovieRecommender),
+        asyncio.to_thread(SongRecommender),
+        asyncio.to_thread(StressDetector),
+        asyncio.to_thread(EmotionDetector, use_mock=False),
+        asyncio.to_thread(HierarchicalBandit),
+        return_exceptions=True,
+    )
+
+    if not _register_model(app, "movie", "Movie Recommender", movie):
+        _disable_routes(app, "/movies", "Movie recommender")
+    if not _register_model(app, "song", "Song Recommender", song):
+        logger.info("   This may be due to database connection issues.")
+        _disable_routes(app, "/songs", "Song recommender")
+    _register_model(app, "stress", "Stress Detector", stress)
+    _register_model(app, "bandit", "Contextual Bandit", bandit)
+
+    if isinstance(emotion, BaseException):
+        logger.warning("⚠️  Error loading real Emotion Detector: %s", emotion)
+        logger.info("   Falling back to MOCK Emotion Detector.")
         try:
-            emotion_detector = EmotionDetector(use_mock=True)
-            app.state.recommenders["emotion"] = emotion_detector  # type: ignore[assignment]
-            app.state.model_status["emotion_loaded"] = True  # type: ignore[assignment]
-            print("✅ Mock Emotion Detector loaded.")
-        except Exception as e2:
-            print(f"❌ Error loading Mock Emotion Detector: {e2}")
-            traceback.print_exc()
-
-    # Load contextual bandit
-    print("\n🎰 Loading Contextual Bandit...")
-    try:
-        bandit = HierarchicalBandit()
-        app.state.recommenders["bandit"] = bandit  # type: ignore[assignment]
-        app.state.model_status["bandit_loaded"] = True  # type: ignore[assignment]
-        print("✅ Contextual Bandit loaded successfully!")
-    except Exception as e:
-        print(f"❌ Error loading Contextual Bandit: {e}")
-        traceback.print_exc()
-
-    print("\n" + "=" * 60)
-    print("🌐 Server is ready to accept requests")
-    print("=" * 60 + "\n")
+            emotion = EmotionDetector(use_mock=True)
+        except Exception as e:
+            emotion = e
+    _register_model(app, "emotion", "Emotion Detector", emotion)
+
+    recommenders: Recommenders = app.state.recommenders
+    if recommenders.stress:
+        recommenders.stress_batcher = AsyncBatcher(recommenders.stress.predict_batch)
+    if recommenders.emotion:
+        recommenders.emotion_batcher = AsyncBatcher(recommenders.emotion.predict_batch)
+
+    logger.info("🔥 Warming up connections and models...")
+    await _warm_up(app)
+
+    logger.info("=" * 60)
+    logger.info("🌐 Server is ready to accept requests")
+    logger.info("=" * 60)
 
     # Yield control to the application
     yield
 
     # Cleanup on shutdown
-    print("\n🛑 Shutting down server...")
+    logger.info("🛑 Shutting down server...")
 
     # Close database connections
-    if app.state.recommenders["movie"]:
-        app.state.recommenders["movie"].close()
-        print("   Closed movie recommender database connection.")
-
-    if app.state.recommenders["song"]:
-        app.state.recommenders["song"].close()
-        print("   Closed song recommender database connection.")
-
-    if app.state.recommenders["stress"]:
-        app.state.recommenders["stress"].close()
-        print("   Closed stress detector.")
-
-    if app.state.recommenders["emotion"]:
-        app.state.recommenders["emotion"].close()
-        print("   Closed emotion detector.")
-
-    if app.state.recommenders["bandit"]:
-        app.state.recommenders["bandit"].close()
-        print("   Closed contextual bandit.")
+    if recommenders.movie:
+        recommenders.movie.close()
+        logger.info("   Closed movie recommender database connection.")
+
+    if recommenders.song:
+        recommenders.song.close()
+        logger.info("   Closed song recommender database connection.")
+
+    if recommenders.stress:
+        recommenders.stress.close()
+        logger.info("   Closed stress detector.")
+
+    if recommenders.emotion:
+        recommenders.emotion.close()
+        logger.info("   Closed emotion detector.")
+
+    if recommenders.bandit:
+        # Waits on the bandit lock for any in-flight background update
+        await asyncio.to_thread(recommenders.bandit.close)
+        logger.info("   Closed contextual bandit.")
+
+    # Bandit flushes through the pool, so close it last
+    close_db_pool()
+    if app.state.db_pool is not None:
+        await app.state.db_pool.close()
+        app.state.db_pool = None
+    logger.info("   Closed database connection pools.")
 
     # Clear references
-    app.state.recommenders["movie"] = None
-    app.state.recommenders["song"] = None
-    app.state.recommenders["stress"] = None
-    app.state.recommenders["emotion"] = None
-    app.state.recommenders["bandit"] = None
+    app.state.recommenders = Recommenders()
 
-    print("👋 Server shutdown complete.\n")
+    logger.info("👋 Server shutdown complete.")
+    stop_logging()
 
 
 # =============================================================================
@@ -227,6 +310,7 @@ app = FastAPI(
     description=API_DESCRIPTION,
     version=API_VERSION,
     lifespan=lifespan,
+    default_response_class=ORJSONResponse,
     docs_url="/docs",
     redoc_url="/redoc",
     openapi_url="/openapi.json",
@@ -309,10 +393,21 @@ if __name__ == "__main__":
     port = int(os.getenv("PORT", "8000"))
     reload = os.getenv("RELOAD", "true").lower() == "true"
 
-    print(f"\n🔧 Starting server on http://{host}:{port}")
+    # One worker by default. WORKERS > 1 is unsupported for now: each worker
+    # keeps its own in-memory bandit and flushes it last-writer-wins over the
+    # same bandit_models rows, so workers overwrite each other's learning.
+    # Every worker also loads its own copy of the models and opens its own
+    # DB pools. Reload only works with a single worker.
+    workers = int(os.getenv("WORKERS", "1"))
+    reload = reload and workers == 1
+
+    print(f"\n🔧 Starting server on http://{host}:{port} ({workers} worker(s))")
     uvicorn.run(
         "main:app",
         host=host,
         port=port,
         reload=reload,
+        workers=workers,
+        loop="asyncio" if sys.platform == "win32" else "uvloop",
+        http="httptools",
     )
@@ -4,8 +4,16 @@ Movie recommendation API routes.
 This module provides endpoints for movie recommendations using the LightFM model.
 """
 
+import asyncio
+from typing import Iterable, Iterator
+
+import orjson
+import pandas as pd
+import psycopg2
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import ORJSONResponse, StreamingResponse
 
+from core.cache import TTLCache
 from core.dependencies import get_movie_recommender
 from services.movie_recommender import MovieRecommender
 from core.schemas import (
@@ -18,7 +26,179 @@ from core.schemas import (
     MovieSearchResponse,
 )
 
-router = APIRouter(prefix="/movies", tags=["Movies"])
+router = APIRouter(
+    prefix="/movies", tags=["Movies"], default_response_class=ORJSONResponse
+)
+
+# (sorted liked ids, n_recommendations, exclude_liked) -> recommendations.
+# Onboarding sessions often submit the same popular seed movies; the TTL lets
+# the daily age cut-off roll over.
+_RECOMMENDATIONS_CACHE = TTLCache(maxsize=4096, ttl=3600)
+
+
+def _normalize_decade(df: pd.DataFrame) -> pd.DataFrame:
+    """Turn empty or missing decades into None once for the whole frame."""
+    if not df.empty:
+        decade = df["decade"]
+        # object dtype so None survives pandas' string dtype
+        df["decade"] = decade.astype(object).where(
+            decade.notna() & (decade != ""), None
+        )
+    return df
+
+
+def _movie_rows(df: pd.DataFrame) -> Iterator[tuple[int, str, str, str | None]]:
+    """
+    Yield (movie_id, title, genres, decade) for each row of a movie frame.
+
+    Each column is converted to Python objects with one bulk tolist() call,
+    so the per-row loop does no int()/str() casts.
+    """
+    if df.empty:
+        return iter(())
+    return zip(
+        df["movieId"].astype(int).tolist(),
+        df["title"].astype(str).tolist(),
+        df["genres"].astype(str).tolist(),
+        df["decade"].tolist(),
+    )
+
+
+def _scores(df: pd.DataFrame) -> list[float]:
+    """Return the score column as Python floats in one bulk conversion."""
+    return df["score"].astype(float).tolist() if not df.empty else []
+
+
+def _movie_stream_records(df: pd.DataFrame, score: bool = False) -> Iterator[dict]:
+    """
+    Lazily yield one response dict per row of a movie frame, for streaming.
+
+    Rows are read with itertuples() as the response is sent, so no list of
+    records or models is built up front.
+    """
+    if df.empty:
+        return
+    columns = ["movieId", "title", "genres", "decade"] + (["score"] if score else [])
+    for row in df[columns].itertuples(index=False, name=None):
+        record = {
+            "movie_id": int(row[0]),
+            "title": str(row[1]),
+            "genres": str(row[2]),
+            "decade": row[3],
+        }
+        if score:
+            record["score"] = float(row[4])
+        yield record
+
+
+def _ndjson_response(records: Iterable[dict]) -> StreamingResponse:
+    """Stream records as newline-delimited JSON, one line per record."""
+    return StreamingResponse(
+        (orjson.dumps(record) + b"\n" for record in records),
+        media_type="application/x-ndjson",
+    )
+
+
+def _get_liked_movies(
+    recommender: MovieRecommender, movie_ids: list[int]
+) -> list[MovieInfo]:
+    """Look up info for the user's liked movies, skipping unknown ids."""
+    # Rows come from the recommender's own typed columns; skip validation
+    infos_df = _normalize_decade(recommender.get_movie_infos(movie_ids))
+    return [
+        MovieInfo.model_construct(
+            movie_id=movie_id, title=title, genres=genres, decade=decade
+        )
+        for movie_id, title, genres, decade in _movie_rows(infos_df)
+    ]
+
+
+def _recommendations_key(request: MovieRecommendRequest) -> tuple:
+    """Cache key for a request's recommendations (liked ids in any order)."""
+    return (
+        tuple(sorted(request.liked_movie_ids)),
+        request.n_recommendations,
+        request.exclude_liked,
+    )
+
+
+def _get_recommendations(
+    recommender: MovieRecommender, request: MovieRecommendRequest
+) -> tuple[MovieRecommendation, ...]:
+    """
+    Score recommendations for the request's liked movies.
+
+    Recommendations don't depend on id order, so they are cached per
+    sorted id set and a repeat seed set skips LightFM entirely.
+
+    Args:
+        recommender: Loaded movie recommender
+        request: Validated recommendation request
+
+    Returns:
+        Recommendations, best first
+    """
+    liked_ids = request.liked_movie_ids
+    key = _recommendations_key(request)
+    recommendations = _RECOMMENDATIONS_CACHE.get(key)
+    if recommendations is None:
+        recommendations_df = _normalize_decade(
+            recommender.recommend(
+                liked_item_ids=liked_ids,
+                n_recommendations=request.n_recommendations,
+                exclude_liked=request.exclude_liked,
+                min_years_old=10,
+            )
+        )
+        # Frozen models, so one tuple can be shared by every cache hit
+        recommendations = tuple(
+            MovieRecommendation.model_construct(
+                movie_id=movie_id,
+                title=title,
+                genres=genres,
+                decade=decade,
+                score=score,
+            )
+            for (movie_id, title, genres, decade), score in zip(
+                _movie_rows(recommendations_df), _scores(recommendations_df)
+            )
+        )
+        if recommendations:
+            _RECOMMENDATIONS_CACHE.set(key, recommendations)
+
+    return recommendations
+
+
+def _stream_recommendations(
+    recommender: MovieRecommender, request: MovieRecommendRequest
+) -> Iterator[dict]:
+    """
+    Score recommendations for streaming.
+
+    A cached result is replayed as-is; otherwise rows are read lazily from
+    the scored frame, without building (or caching) response models.
+
+    Args:
+        recommender: Loaded movie recommender
+        request: Validated recommendation request
+
+    Returns:
+        Iterator of recommendation dicts, best first
+    """
+    liked_ids = request.liked_movie_ids
+    recommendations = _RECOMMENDATIONS_CACHE.get(_recommendations_key(request))
+    if recommendations is not None:
+        return (rec.model_dump() for rec in recommendations)
+
+    recommendations_df = _normalize_decade(
+        recommender.recommend(
+            liked_item_ids=liked_ids,
+            n_recommendations=request.n_recommendations,
+            exclude_liked=request.exclude_liked,
+            min_years_old=10,
+        )
+    )
+    return _movie_stream_records(recommendations_df, score=True)
 
 
 @router.post(
@@ -34,60 +214,44 @@ router = APIRouter(prefix="/movies", tags=["Movies"])
 async def recommend_movies(
     request: MovieRecommendRequest,
     recommender: MovieRecommender = Depends(get_movie_recommender),
-) -> MovieRecommendResponse:
+) -> ORJSONResponse | StreamingResponse:
     """
     Get movie recommendations based on liked movies.
 
     Uses LightFM's user folding technique to generate personalized
     recommendations for new users (cold-start support).
     """
-    try:
-        # Get liked movies info
-        liked_movies: list[MovieInfo] = []
-        for movie_id in request.liked_movie_ids:
-            info = recommender.get_movie_info(movie_id)
-            if "error" not in info:
-                liked_movies.append(
-                    MovieInfo(
-                        movie_id=int(info.get("movieId", movie_id)),
-                        title=str(info.get("title", "Unknown")),
-                        genres=str(info.get("genres", "")),
-                        decade=str(info.get("decade", ""))
-                        if info.get("decade")
-                        else None,
-                    )
-                )
-
-        # Generate recommendations
-        recommendations_df = recommender.recommend(
-            liked_items=[
-                {"movieId": mid, "timestamp": None} for mid in request.liked_movie_ids
-            ],  # Fix: adapt to new signature if needed, or check signature
-            n_recommendations=request.n_recommendations,
-            exclude_liked=request.exclude_liked,
-            min_years_old=10,
-        )
+    # Drop repeated ids (double clicks in onboarding), keeping first-seen order
+    liked_ids = list(dict.fromkeys(request.liked_movie_ids))
+    if len(liked_ids) != len(request.liked_movie_ids):
+        request = request.model_copy(update={"liked_movie_ids": liked_ids})
 
-        recommendations: list[MovieRecommendation] = []
-        for _, row in recommendations_df.iterrows():
-            recommendations.append(
-                MovieRecommendation(
-                    movie_id=int(row["movieId"]),
-                    title=str(row["title"]),
-                    genres=str(row["genres"]),
-                    decade=str(row["decade"]) if row.get("decade") else None,
-                    score=float(row["score"]),
-                )
+    try:
+        if request.stream:
+            # One MovieRecommendation per line; liked_movies is not streamed,
+            # so it isn't looked up either
+            return _ndjson_response(
+                await asyncio.to_thread(_stream_recommendations, recommender, request)
             )
 
-        return MovieRecommendResponse(
-            recommendations=recommendations,
-            liked_movies=liked_movies,
+        # The liked-movie DB lookup and LightFM scoring are independent and
+        # both release the GIL for most of their time; overlap them off-loop
+        liked_movies, recommendations = await asyncio.gather(
+            asyncio.to_thread(_get_liked_movies, recommender, liked_ids),
+            asyncio.to_thread(_get_recommendations, recommender, request),
+        )
+
+        # Built from trusted recommender rows; skip validation
+        return ORJSONResponse(
+            MovieRecommendResponse.model_construct(
+                recommendations=list(recommendations),
+                liked_movies=liked_movies,
+            ).model_dump()
         )
 
     except ValueError as e:
         raise HTTPException(status_code=400, detail=str(e)) from e
-    except Exception as e:
+    except (psycopg2.Error, KeyError) as e:
         raise HTTPException(
             status_code=500, detail=f"Error generating recommendations: {e}"
         ) from e
@@ -102,22 +266,15 @@ async def recommend_movies(
     summary="Get movie information",
     description="Get information about a specific movie by its MovieLens ID.",
 )
-async def get_movie(
+def get_movie(
     movie_id: int,
     recommender: MovieRecommender = Depends(get_movie_recommender),
-) -> MovieInfo:
+) -> ORJSONResponse:
     """Get information about a specific movie."""
-    info = recommender.get_movie_info(movie_id)
-
-    if "error" in info:
+    movie = recommender.get_movie_info_model(movie_id)
+    if movie is None:
         raise HTTPException(status_code=404, detail=f"Movie {movie_id} not found")
-
-    return MovieInfo(
-        movie_id=int(info.get("movieId", movie_id)),
-        title=str(info.get("title", "Unknown")),
-        genres=str(info.get("genres", "")),
-        decade=str(info.get("decade", "")) if info.get("decade") else None,
-    )
+    return ORJSONResponse(movie.model_dump())
 
 
 @router.post(
@@ -126,28 +283,31 @@ async def get_movie(
     summary="Search for movies",
     description="Search for movies by title.",
 )
-async def search_movies(
+def search_movies(
     request: MovieSearchRequest,
     recommender: MovieRecommender = Depends(get_movie_recommender),
-) -> MovieSearchResponse:
+) -> ORJSONResponse | StreamingResponse:
     """Search for movies by title."""
     # Enforce 10-year age filter for nostalgic onboarding
     results_df = recommender.search_movies(
         request.query, limit=request.limit, min_years_old=10
     )
 
-    results: list[MovieInfo] = []
-    for _, row in results_df.iterrows():
-        results.append(
-            MovieInfo(
-                movie_id=int(row["movieId"]),
-                title=str(row["title"]),
-                genres=str(row["genres"]),
-                decade=str(row.get("decade", "")) if row.get("decade") else None,
-            )
+    results_df = _normalize_decade(results_df)
+    if request.stream:
+        # One MovieInfo per line
+        return _ndjson_response(_movie_stream_records(results_df))
+
+    results = [
+        MovieInfo.model_construct(
+            movie_id=movie_id, title=title, genres=genres, decade=decade
         )
+        for movie_id, title, genres, decade in _movie_rows(results_df)
+    ]
 
-    return MovieSearchResponse(
-        results=results,
-        query=request.query,
+    return ORJSONResponse(
+        MovieSearchResponse.model_construct(
+            results=results,
+            query=request.query,
+        ).model_dump()
     )
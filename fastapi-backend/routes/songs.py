@@ -4,13 +4,19 @@ Song recommendation API routes.
 This module provides endpoints for song recommendations using pgvector.
 """
 
-from typing import Any, Union
+import asyncio
+from collections.abc import Mapping
+from typing import Any
 
+import numpy as np
 import pandas as pd
-from fastapi import APIRouter, Depends, HTTPException
+import psycopg2
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import ORJSONResponse
 
+from core.cache import TTLCache
 from core.dependencies import get_song_recommender
-from services.song_recommender import SongRecommender
+from services.song_recommender import EF_SEARCH_MAX, SongRecommender
 from core.schemas import (
     ErrorResponse,
     SongDetails,
@@ -24,30 +30,131 @@ from core.schemas import (
 )
 
 
-def _get_int(d: Union[dict[str, Any], pd.Series], key: str) -> int | None:
-    """Safely get an int value from a dict or Series."""
-    val = d.get(key)
-    if val is None:
-        return None
-    try:
-        return int(val)
-    except (ValueError, TypeError):
-        return None
+# spotify_id -> built query-song model. Frozen, so one instance is shared by
+# every response; bounded like the recommender's song info cache.
+_SONG_INFO_MODELS = TTLCache(maxsize=10_000, ttl=3600)
+
 
+# Numeric SongDetails fields and the type each DB value is cast to
+_SONG_DETAIL_NUMERIC_FIELDS: dict[str, type] = {
+    "year": int,
+    "danceability": float,
+    "energy": float,
+    "key": int,
+    "loudness": float,
+    "mode": int,
+    "speechiness": float,
+    "acousticness": float,
+    "instrumentalness": float,
+    "liveness": float,
+    "valence": float,
+    "tempo": float,
+}
 
-def _get_float(d: Union[dict[str, Any], pd.Series], key: str) -> float | None:
-    """Safely get a float value from a dict or Series."""
-    val = d.get(key)
-    if val is None:
+
+def _cast(value: Any, target: type) -> Any:
+    """Cast a DB value to int or float, or None if missing or invalid."""
+    if value is None:
         return None
     try:
-        return float(val)
+        return target(value)
     except (ValueError, TypeError):
         return None
 
 
+def _song_records(df: pd.DataFrame, similarity: bool = False) -> list[dict]:
+    """
+    Convert a song frame to response-ready records in bulk.
+
+    Columns are cast once per column (ids/names to str, empty genres to None,
+    years to int or None, similarity to float) instead of per row.
+
+    Args:
+        df: Frame with spotify_id, name, artists and optional genre/year
+        similarity: Also include the similarity column (missing -> 0.0)
+
+    Returns:
+        One dict per row, keyed by the response model's field names
+    """
+    if df.empty:
+        return []
+
+    missing = pd.Series(None, index=df.index, dtype=object)
+    genre = df["genre"] if "genre" in df.columns else missing
+    has_genre = genre.notna() & (genre != "")
+    year = pd.to_numeric(df.get("year", missing), errors="coerce")
+    year = np.trunc(year).astype("Int64").astype(object)
+
+    columns = {
+        "spotify_id": df["spotify_id"].astype(str),
+        "name": df["name"].astype(str),
+        "artists": df["artists"].astype(str),
+        # object dtype so None survives pandas' string dtype
+        "genre": genre.astype(str).astype(object).where(has_genre, None),
+        "year": year.where(year.notna(), None),
+    }
+    if similarity:
+        columns["similarity"] = pd.to_numeric(
+            df.get("similarity", missing), errors="coerce"
+        ).fillna(0.0)
+    return pd.DataFrame(columns).to_dict(orient="records")
+
+
+def _query_song(info: Mapping[str, Any]) -> SongInfo:
+    """Build (or reuse) the SongInfo for a song row (get_song_info or a by-id seed)."""
+    song = _SONG_INFO_MODELS.get(info["id"])
+    if song is None:
+        # id, name, genre and year already have the model's types; artists is jsonb
+        song = SongInfo.model_construct(
+            spotify_id=info["id"],
+            name=info["name"],
+            artists=str(info["artists"]),
+            genre=info["genre"] or None,
+            year=info["year"],
+        )
+        _SONG_INFO_MODELS.set(info["id"], song)
+    return song
+
+
+def _song_infos(records: list[dict]) -> list[SongInfo]:
+    """Build SongInfo models from typed song records."""
+    # Values are already the model's types; skip validation
+    return [
+        SongInfo.model_construct(
+            spotify_id=str(r["spotify_id"]),
+            name=str(r["name"]),
+            artists=str(r["artists"]),
+            genre=r["genre"],
+            year=r["year"],
+        )
+        for r in records
+    ]
+
+
+def _song_recommendations(records: list[dict]) -> list[SongRecommendation]:
+    """Build SongRecommendation models from typed recommendation records."""
+    return [
+        SongRecommendation.model_construct(
+            spotify_id=str(r["spotify_id"]),
+            name=str(r["name"]),
+            artists=str(r["artists"]),
+            genre=r["genre"],
+            year=r["year"],
+            similarity=r["similarity"],
+        )
+        for r in records
+    ]
+
+
 router = APIRouter(prefix="/songs", tags=["Songs"])
 
+# Optional HNSW recall/speed knob; the recommender clamps it server-side
+_EF_SEARCH_QUERY = Query(
+    default=None,
+    ge=1,
+    description=f"HNSW ef_search override (clamped to at most {EF_SEARCH_MAX})",
+)
+
 
 @router.post(
     "/recommend",
@@ -62,7 +169,8 @@ router = APIRouter(prefix="/songs", tags=["Songs"])
 async def recommend_songs(
     request: SongRecommendRequest,
     recommender: SongRecommender = Depends(get_song_recommender),
-) -> SongRecommendResponse:
+    ef_search: int | None = _EF_SEARCH_QUERY,
+) -> ORJSONResponse:
     """
     Get song recommendations based on liked songs.
 
@@ -70,57 +178,60 @@ async def recommend_songs(
     Averages the embeddings of liked songs and finds similar songs.
     """
     try:
-        # Get info for query songs
-        query_songs: list[SongInfo] = []
+        # Reuse built query-song models; look the rest up in one round trip
+        query_models: dict[str, SongInfo] = {}
         for song_id in request.liked_song_ids:
-            info = recommender.get_song_info(song_id)
-            if info:
-                query_songs.append(
-                    SongInfo(
-                        spotify_id=str(info.get("id", song_id)),
-                        name=str(info.get("name", "Unknown")),
-                        artists=str(info.get("artists", "Unknown")),
-                        genre=str(info.get("genre")) if info.get("genre") else None,
-                        year=_get_int(info, "year"),
-                    )
-                )
+            song = _SONG_INFO_MODELS.get(song_id)
+            if song is not None:
+                query_models[song_id] = song
+        missing = [sid for sid in request.liked_song_ids if sid not in query_models]
+        if missing:
+            # The recommender blocks on psycopg2; keep those calls off the loop
+            infos = await asyncio.to_thread(recommender.get_songs_info, missing)
+            for song_id, info in infos.items():
+                query_models[song_id] = _query_song(info)
+        query_songs = [
+            query_models[song_id]
+            for song_id in request.liked_song_ids
+            if song_id in query_models
+        ]
 
         # Generate recommendations - convert song IDs to the expected format
         liked_items = [
             {"spotify_id": sid, "timestamp": None} for sid in request.liked_song_ids
         ]
-        recommendations_df = recommender.recommend(
+        recommendations_df = await asyncio.to_thread(
+            recommender.recommend,
             liked_items=liked_items,
             n_recommendations=request.n_recommendations,
             exclude_liked=request.exclude_liked,
             min_years_old=10,
+            ef_search=ef_search,
         )
 
         if recommendations_df.empty:
-            return SongRecommendResponse(
-                recommendations=[],
-                query_songs=query_songs,
+            return ORJSONResponse(
+                SongRecommendResponse.model_construct(
+                    recommendations=[],
+                    query_songs=query_songs,
+                ).model_dump()
             )
 
-        recommendations: list[SongRecommendation] = []
-        for _, row in recommendations_df.iterrows():
-            recommendations.append(
-                SongRecommendation(
-                    spotify_id=str(row["spotify_id"]),
-                    name=str(row["name"]),
-                    artists=str(row["artists"]),
-                    genre=str(row.get("genre")) if row.get("genre") else None,
-                    year=_get_int(row, "year"),
-                    similarity=_get_float(row, "similarity") or 0.0,
-                )
-            )
+        recommendations = _song_recommendations(
+            _song_records(recommendations_df, similarity=True)
+        )
 
-        return SongRecommendResponse(
-            recommendations=recommendations,
-            query_songs=query_songs,
+        # Built from trusted recommender rows; skip validation
+        return ORJSONResponse(
+            SongRecommendResponse.model_construct(
+                recommendations=recommendations,
+                query_songs=query_songs,
+            ).model_dump()
         )
 
-    except Exception as e:
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except (psycopg2.Error, KeyError) as e:
         raise HTTPException(
             status_code=500, detail=f"Error generating recommendations: {e}"
         ) from e
@@ -139,56 +250,40 @@ async def recommend_songs(
 async def recommend_songs_by_id(
     request: SongRecommendByIdRequest,
     recommender: SongRecommender = Depends(get_song_recommender),
-) -> SongRecommendResponse:
+    ef_search: int | None = _EF_SEARCH_QUERY,
+) -> ORJSONResponse:
     """
     Get song recommendations based on a single song.
 
     Uses the pre-computed embedding from pgvector for fastest query.
     """
     try:
-        # Get info for query song
-        info = recommender.get_song_info(request.spotify_id)
-        if not info:
+        # Seed song and its neighbours come back from one query
+        seed, records = await asyncio.to_thread(
+            recommender.recommend_by_id_with_seed,
+            spotify_id=request.spotify_id,
+            n_recommendations=request.n_recommendations,
+            ef_search=ef_search,
+        )
+        if not seed:
             raise HTTPException(
                 status_code=404,
                 detail=f"Song {request.spotify_id} not found in database",
             )
 
-        query_song = SongInfo(
-            spotify_id=str(info.get("id", request.spotify_id)),
-            name=str(info.get("name", "Unknown")),
-            artists=str(info.get("artists", "Unknown")),
-            genre=str(info.get("genre")) if info.get("genre") else None,
-            year=_get_int(info, "year"),
-        )
-
-        # Generate recommendations
-        recommendations_df = recommender.recommend_by_id(
-            spotify_id=request.spotify_id,
-            n_recommendations=request.n_recommendations,
-        )
+        query_song = _query_song(seed)
+        recommendations = _song_recommendations(records)
 
-        recommendations: list[SongRecommendation] = []
-        for _, row in recommendations_df.iterrows():
-            recommendations.append(
-                SongRecommendation(
-                    spotify_id=str(row["spotify_id"]),
-                    name=str(row["name"]),
-                    artists=str(row["artists"]),
-                    genre=str(row.get("genre")) if row.get("genre") else None,
-                    year=_get_int(row, "year"),
-                    similarity=_get_float(row, "similarity") or 0.0,
-                )
-            )
-
-        return SongRecommendResponse(
-            recommendations=recommendations,
-            query_songs=[query_song],
+        return ORJSONResponse(
+            SongRecommendResponse.model_construct(
+                recommendations=recommendations,
+                query_songs=[query_song],
+            ).model_dump()
         )
 
-    except HTTPException:
-        raise
-    except Exception as e:
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e)) from e
+    except (psycopg2.Error, KeyError) as e:
         raise HTTPException(
             status_code=500, detail=f"Error generating recommendations: {e}"
         ) from e
@@ -206,34 +301,28 @@ async def recommend_songs_by_id(
 async def get_song(
     spotify_id: str,
     recommender: SongRecommender = Depends(get_song_recommender),
-) -> SongDetails:
+) -> ORJSONResponse:
     """Get detailed information about a specific song."""
-    info = recommender.get_song_info(spotify_id)
+    info = await asyncio.to_thread(recommender.get_song_info, spotify_id)
 
     if not info:
         raise HTTPException(status_code=404, detail=f"Song {spotify_id} not found")
 
-    return SongDetails(
-        spotify_id=str(info.get("id", spotify_id)),
-        name=str(info.get("name", "Unknown")),
-        artists=str(info.get("artists", "Unknown")),
-        genre=str(info.get("genre")) if info.get("genre") else None,
-        year=_get_int(info, "year"),
-        danceability=_get_float(info, "danceability"),
-        energy=_get_float(info, "energy"),
-        key=_get_int(info, "key"),
-        loudness=_get_float(info, "loudness"),
-        mode=_get_int(info, "mode"),
-        speechiness=_get_float(info, "speechiness"),
-        acousticness=_get_float(info, "acousticness"),
-        instrumentalness=_get_float(info, "instrumentalness"),
-        liveness=_get_float(info, "liveness"),
-        valence=_get_float(info, "valence"),
-        tempo=_get_float(info, "tempo"),
+    # Trusted DB data cast to the field types; skip validation
+    song = SongDetails.model_construct(
+        spotify_id=info["id"],
+        name=info["name"],
+        artists=str(info["artists"]),
+        genre=info["genre"] or None,
+        **{
+            field: _cast(info.get(field), target)
+            for field, target in _SONG_DETAIL_NUMERIC_FIELDS.items()
+        },
         niche_genres=str(info.get("niche_genres"))
         if info.get("niche_genres")
         else None,
     )
+    return ORJSONResponse(song.model_dump())
 
 
 @router.post(
@@ -245,31 +334,25 @@ async def get_song(
 async def search_songs(
     request: SongSearchRequest,
     recommender: SongRecommender = Depends(get_song_recommender),
-) -> SongSearchResponse:
+) -> ORJSONResponse:
     """Search for songs by name or artist."""
     try:
         # Enforce 10-year age filter for nostalgic onboarding
-        results_df = recommender.search_songs(
-            request.query, limit=request.limit, min_years_old=10
+        records = await asyncio.to_thread(
+            recommender.search_songs_records,
+            request.query,
+            limit=request.limit,
+            min_years_old=10,
         )
+        results = _song_infos(records)
 
-        results: list[SongInfo] = []
-        for _, row in results_df.iterrows():
-            results.append(
-                SongInfo(
-                    spotify_id=str(row["spotify_id"]),
-                    name=str(row["name"]),
-                    artists=str(row["artists"]),
-                    genre=str(row.get("genre")) if row.get("genre") else None,
-                    year=_get_int(row, "year"),
-                )
-            )
-
-        return SongSearchResponse(
-            results=results,
-            query=request.query,
+        return ORJSONResponse(
+            SongSearchResponse.model_construct(
+                results=results,
+                query=request.query,
+            ).model_dump()
         )
-    except Exception as e:
+    except (psycopg2.Error, KeyError) as e:
         raise HTTPException(
             status_code=500, detail=f"Error searching songs: {e}"
         ) from e
@@ -6,16 +6,24 @@ This module provides endpoints for text analysis including:
 - Emotion classification
 """
 
+import asyncio
+import logging
+from typing import Any
+
 from fastapi import APIRouter, HTTPException, Request
 
 from core.schemas import (
+    DEFAULT_EMOTION_RESULT,
     EmotionResult,
     StressDetectionRequest,
     StressDetectionResponse,
     TextAnalysisRequest,
     TextAnalysisResponse,
 )
+from services.batcher import AsyncBatcher
+
 
+logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/analyze", tags=["Text Analysis"])
 
@@ -37,36 +45,32 @@ async def analyze_text(
         - stress_score: 0 (no stress) to 1 (high stress)
         - emotion: detected emotion with confidence and probabilities
     """
-    stress_detector = request.app.state.recommenders.get("stress")
-    emotion_detector = request.app.state.recommenders.get("emotion")
+    recommenders = request.app.state.recommenders
 
-    # Get stress prediction
     stress_score = 0.5  # Default if model not loaded
-    if stress_detector is not None:
-        try:
-            stress_score = stress_detector.predict(body.text)
-        except Exception as e:
-            print(f"Error during stress prediction: {e}")
-
-    # Get emotion prediction
-    emotion_result = {
-        "emotion": "neutral",
-        "confidence": 0.5,
-        "probabilities": {
-            "anger": 0.1,
-            "fear": 0.1,
-            "joy": 0.1,
-            "love": 0.1,
-            "neutral": 0.5,
-            "sadness": 0.05,
-            "surprise": 0.05,
-        },
-    }
-    if emotion_detector is not None:
-        try:
-            emotion_result = emotion_detector.predict(body.text)
-        except Exception as e:
-            print(f"Error during emotion prediction: {e}")
+    emotion_result = DEFAULT_EMOTION_RESULT
+
+    async def predict(batcher: AsyncBatcher | None) -> Any:
+        if batcher is None:
+            return None
+        return await batcher.submit(body.text)
+
+    # Independent forward passes, each batched with concurrent requests' texts
+    stress_prediction, emotion_prediction = await asyncio.gather(
+        predict(recommenders.stress_batcher),
+        predict(recommenders.emotion_batcher),
+        return_exceptions=True,
+    )
+
+    if isinstance(stress_prediction, Exception):
+        logger.error("Stress prediction failed", exc_info=stress_prediction)
+    elif stress_prediction is not None:
+        stress_score = stress_prediction
+
+    if isinstance(emotion_prediction, Exception):
+        logger.error("Emotion prediction failed", exc_info=emotion_prediction)
+    elif emotion_prediction is not None:
+        emotion_result = emotion_prediction
 
     return TextAnalysisResponse(
         text=body.text,
@@ -96,7 +100,7 @@ async def predict_stress(
 
     This endpoint is deprecated. Use /analyze/text instead.
     """
-    detector = request.app.state.recommenders.get("stress")
+    detector = request.app.state.recommenders.stress
 
     if detector is None:
         raise HTTPException(
@@ -105,7 +109,7 @@ async def predict_stress(
         )
 
     try:
-        stress_score = detector.predict(body.text)
+        stress_score = await asyncio.to_thread(detector.predict, body.text)
     except Exception as e:
         raise HTTPException(
             status_code=500,
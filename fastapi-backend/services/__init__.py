@@ -5,6 +5,7 @@ from services.song_recommender import SongRecommender
 from services.contextual_bandit import HierarchicalBandit
 from services.emotion_detector import EmotionDetector
 from services.stress_detector import StressDetector
+from services.batcher import AsyncBatcher
 
 __all__ = [
     "MovieRecommender",
@@ -12,4 +13,5 @@ __all__ = [
     "HierarchicalBandit",
     "EmotionDetector",
     "StressDetector",
+    "AsyncBatcher",
 ]
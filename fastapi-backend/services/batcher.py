@@ -0,0 +1,89 @@
+"""
+Request coalescing for the text models.
+
+Concurrent requests each carry one short text, while a transformer forward
+pass costs roughly the same for a small batch as for a single input.
+AsyncBatcher collects the texts submitted within a short window and scores
+them with one batched call in a worker thread.
+"""
+
+import asyncio
+from typing import Any, Callable, Optional
+
+
+class AsyncBatcher:
+    """Coalesce concurrent single-text predictions into batched calls."""
+
+    def __init__(
+        self,
+        predict_batch: Callable[[list[str]], list[Any]],
+        max_wait_ms: float = 10,
+        max_batch: int = 32,
+    ) -> None:
+        """
+        Initialize the batcher.
+
+        Args:
+            predict_batch: Blocking function scoring a list of texts, returning
+                one result per text in order (e.g. StressDetector.predict_batch)
+            max_wait_ms: How long the first text of a batch waits for others
+            max_batch: Batch size that triggers an immediate flush
+        """
+        self._predict_batch = predict_batch
+        self._max_wait = max_wait_ms / 1000
+        self._max_batch = max_batch
+        self._pending: list[tuple[str, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        # Strong references so in-flight batches aren't garbage collected
+        self._tasks: set[asyncio.Task] = set()
+
+    async def submit(self, text: str) -> Any:
+        """
+        Score one text as part of the next batch.
+
+        Args:
+            text: Input text to analyze
+
+        Returns:
+            This text's entry of predict_batch's result. Raises whatever
+            predict_batch raised for the batch.
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((text, future))
+
+        if len(self._pending) >= self._max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self._max_wait, self._flush)
+
+        return await future
+
+    def _flush(self) -> None:
+        """Hand the pending texts to a worker thread as one batch."""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+
+        batch, self._pending = self._pending, []
+        if batch:
+            task = asyncio.get_running_loop().create_task(self._run(batch))
+            self._tasks.add(task)
+            task.add_done_callback(self._tasks.discard)
+
+    async def _run(self, batch: list[tuple[str, asyncio.Future]]) -> None:
+        """Score a batch off the event loop and resolve its futures."""
+        try:
+            results = await asyncio.to_thread(
+                self._predict_batch, [text for text, _ in batch]
+            )
+        except Exception as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for (_, future), result in zip(batch, results):
+            # Skip callers that were cancelled while waiting
+            if not future.done():
+                future.set_result(result)
@@ -1,32 +1,38 @@
 """
 Contextual Bandit for Nostalgic Recommendations using MAB2Rec.
 
-This module implements a contextual bandit using the mab2rec library
-with LinUCB policy for selecting optimal nostalgic content recommendations.
+This module implements a contextual bandit with the LinUCB policy for
+selecting optimal nostalgic content recommendations. Per-arm ridge
+regression state is kept in NumPy arrays and updated incrementally.
 
 The bandit learns which content features work best in different
 contexts (stress level, emotion, time of day, etc.).
 Models are stored in PostgreSQL for persistence.
 """
 
+import functools
 import io
 import json
 import math
 import os
+import struct
+import threading
+import zlib
 from collections import OrderedDict
 from datetime import datetime
 from pathlib import Path
-from typing import Any, Callable, ItemsView, Literal
+from typing import Any, Callable, ItemsView, Literal, Sequence
 
 import joblib
 import numpy as np
-from mabwiser.mab import MAB, LearningPolicy
+import psycopg2
+from psycopg2.extras import execute_values
 
 import sys
 
 project_root = Path(__file__).parent.parent.parent
 sys.path.insert(0, str(project_root))
-from core.db import get_db_connection
+from core.db import get_db_connection, put_db_connection
 
 
 # Type aliases
@@ -36,6 +42,27 @@ ContentType = Literal["song", "movie"]
 # Components: stress(1) + emotion(7) + positive_rate(1) + birth_year(1) + padding(2) = 12
 CONTEXT_DIM = 12
 
+# Dtype of contexts and stored LinUCB state (matches build_context_features);
+# updates are computed in float64 and stored back
+STATE_DTYPE = np.float32
+
+# Context slot of each emotion's one-hot bit (slot 0 is stress)
+_EMOTION_INDEX = {
+    "anger": 1,
+    "fear": 2,
+    "joy": 3,
+    "love": 4,
+    "neutral": 5,
+    "sadness": 6,
+    "surprise": 7,
+}
+
+# Serialized LinUCB payloads: leading magic bytes, version tag stored in the
+# header, and the on-disk dtype of the arm stacks
+PAYLOAD_MAGIC = b"LUCB"
+SERIALIZATION_FORMAT = 2
+_PAYLOAD_DTYPE = np.dtype("<f4")
+
 # Default cache settings
 DEFAULT_CACHE_SIZE = 500
 DEFAULT_FLUSH_THRESHOLD = 10
@@ -72,15 +99,21 @@ class LRUCache:
             return self.cache[key]
         return None
 
+    def peek(self, key: str) -> Any | None:
+        """Get item from cache without marking it as recently used."""
+        return self.cache.get(key)
+
     def set(self, key: str, value: Any) -> None:
         """Set item in cache, evicting oldest if over capacity."""
-        if key in self.cache:
-            self.cache.move_to_end(key)
-        self.cache[key] = value
-
-        # Evict oldest if over capacity
-        while len(self.cache) > self.max_size:
-            oldest_key, oldest_value = self.cache.popitem(last=False)
+        cache = self.cache
+        if key in cache:
+            cache.move_to_end(key)
+        cache[key] = value
+
+        # Evict oldest if over capacity. Each set adds at most one key and
+        # max_size is fixed, so the cache is never more than one over.
+        if len(cache) > self.max_size:
+            oldest_key, oldest_value = cache.popitem(last=False)
             if self.on_evict:
                 self.on_evict(oldest_key, oldest_value)
 
@@ -99,11 +132,17 @@ class LRUCache:
 
 class LinUCBBandit:
     """
-    LinUCB contextual bandit using MABWiser.
+    LinUCB contextual bandit.
 
     LinUCB maintains a linear model for each arm and uses upper confidence
     bounds for exploration. It learns the relationship between context
     features and rewards for each arm (content type/genre).
+
+    Each arm keeps A^-1 (A = l2_lambda * I + sum x x^T) and b = sum r x.
+    A single reward is folded in with a rank-1 Sherman-Morrison update, so
+    an update costs O(d^2) instead of re-inverting A. Scores match
+    MABWiser's LinUCB, which this class replaced: x.theta + alpha *
+    sqrt(x^T A^-1 x) with theta = A^-1 b.
     """
 
     def __init__(
@@ -111,6 +150,7 @@ class LinUCBBandit:
         arms: list[str] | None = None,
         alpha: float = 1.0,
         context_dim: int = CONTEXT_DIM,
+        l2_lambda: float = 1.0,
     ) -> None:
         """
         Initialize the LinUCB bandit.
@@ -119,6 +159,7 @@ class LinUCBBandit:
             arms: List of arm identifiers (e.g., content types/genres).
             alpha: Exploration parameter (higher = more exploration).
             context_dim: Number of context features.
+            l2_lambda: Ridge regularization (A starts as l2_lambda * I).
         """
         # Default arms: genre-only (12 total)
         # Genre implicitly identifies content type (movie genres vs song genres don't overlap)
@@ -137,17 +178,29 @@ class LinUCBBandit:
         self.arms = arms
         self.alpha = alpha
         self.context_dim = context_dim
+        self.l2_lambda = l2_lambda
         self.n_updates = 0
 
-        # Initialize MABWiser with LinUCB policy
-        self.mab = MAB(
-            arms=arms,
-            learning_policy=LearningPolicy.LinUCB(alpha=alpha),
-        )
+        # Row of each arm in the stacked per-arm arrays
+        self._arm_index = {arm: i for i, arm in enumerate(arms)}
+        self._reset_arms()
+
+        # (arm, context, reward) rows recorded but not yet fitted
+        self._pending: list[tuple[str, np.ndarray, float]] = []
 
         # Track if we have any training data
         self._is_fitted = False
 
+    def _reset_arms(self) -> None:
+        """Reset every arm to the prior: A = l2_lambda * I, b = 0."""
+        n_arms, d = len(self.arms), self.context_dim
+        # (n_arms, d, d) stack of A^-1, (n_arms, d) stacks of b and theta
+        self._A_inv = np.tile(
+            np.identity(d, dtype=STATE_DTYPE) / self.l2_lambda, (n_arms, 1, 1)
+        )
+        self._b = np.zeros((n_arms, d), dtype=STATE_DTYPE)
+        self._theta = np.zeros((n_arms, d), dtype=STATE_DTYPE)
+
     def _get_arm_from_candidate(self, candidate: dict) -> str:
         """Map a candidate to its genre arm."""
         content_type = candidate.get("type", "movie")
@@ -161,13 +214,82 @@ class LinUCBBandit:
 
     def _ensure_context_shape(self, context: np.ndarray) -> np.ndarray:
         """Ensure context has the right shape."""
-        context = np.array(context).flatten()
+        context = np.asarray(context, dtype=STATE_DTYPE).flatten()
         if len(context) < self.context_dim:
             context = np.pad(context, (0, self.context_dim - len(context)))
         elif len(context) > self.context_dim:
             context = context[: self.context_dim]
         return context.reshape(1, -1)
 
+    def _context_vector(self, context: np.ndarray) -> np.ndarray:
+        """Context as a 1-D float32 vector of length context_dim."""
+        # build_context_features already returns exactly this; skip the
+        # flatten/pad/reshape copies for it
+        if (
+            isinstance(context, np.ndarray)
+            and context.dtype == STATE_DTYPE
+            and context.shape == (self.context_dim,)
+        ):
+            return context
+        return self._ensure_context_shape(context)[0]
+
+    def _arm_scores(self, x: np.ndarray) -> np.ndarray:
+        """UCB score of every arm (in self.arms order) for a context vector."""
+        means = self._theta @ x
+        # x^T A^-1 x is >= 0 in exact arithmetic; rounding accumulated over
+        # many Sherman-Morrison updates can push it just below, so clamp
+        # rather than let sqrt return NaN. Two matmuls rather than a
+        # three-operand einsum: at d = 12 the cost is dispatch, not FLOPs.
+        quad = (self._A_inv @ x) @ x
+        widths = np.sqrt(np.maximum(quad, 0.0))
+        return means + self.alpha * widths
+
+    def predict_expectations(self, context: np.ndarray) -> dict[str, float]:
+        """
+        Score every arm for a context.
+
+        Args:
+            context: Context feature vector.
+
+        Returns:
+            Dict of arm -> UCB score (x.theta + alpha * sqrt(x^T A^-1 x)).
+        """
+        scores = self._arm_scores(self._context_vector(context))
+        return dict(zip(self.arms, scores.tolist()))
+
+    def _select_precomputed(
+        self, x: np.ndarray, candidate_arms: Sequence[str]
+    ) -> tuple[int, float]:
+        """
+        Select among candidates already reduced to a context vector and arms.
+
+        Lets HierarchicalBandit map candidates and shape the context once for
+        both of its models.
+
+        Args:
+            x: Context vector from _context_vector().
+            candidate_arms: Arm of each candidate, in candidate order.
+
+        Returns:
+            Tuple of (selected_index, score).
+        """
+        # If not fitted yet, select randomly
+        if not self._is_fitted:
+            import random
+
+            idx = random.randint(0, len(candidate_arms) - 1)
+            return idx, 0.5
+
+        # Arm expectations depend only on the context: score the arms once,
+        # then gather per candidate (arms this model doesn't know score 0.5)
+        arm_scores = self._arm_scores(x)
+        arm_idx = np.array([self._arm_index.get(arm, -1) for arm in candidate_arms])
+        scores = np.where(arm_idx >= 0, arm_scores[arm_idx], 0.5)
+
+        # Highest score; ties go to the earliest candidate
+        best_idx = int(np.argmax(scores))
+        return best_idx, float(scores[best_idx])
+
     def select(
         self,
         context: np.ndarray,
@@ -186,37 +308,9 @@ class LinUCBBandit:
         if not candidates:
             raise ValueError("No candidates provided")
 
-        context_2d = self._ensure_context_shape(context)
-
-        # If not fitted yet, select randomly
-        if not self._is_fitted:
-            import random
-
-            idx = random.randint(0, len(candidates) - 1)
-            return idx, 0.5
-
         # Map candidates to arms
         candidate_arms = [self._get_arm_from_candidate(c) for c in candidates]
-
-        # Get prediction from MAB for each candidate's arm
-        scores = []
-        for i, arm in enumerate(candidate_arms):
-            if arm in self.arms:
-                # Get expectation for this arm given context
-                expectations = self.mab.predict_expectations(context_2d)
-                # Handle list return type (mabwiser returns list for 2D input)
-                if isinstance(expectations, list):
-                    expectations = expectations[0]
-                score = expectations.get(arm, 0.5)
-            else:
-                score = 0.5
-            scores.append((i, score))
-
-        # Sort by score and return best
-        scores.sort(key=lambda x: x[1], reverse=True)
-        best_idx, best_score = scores[0]
-
-        return best_idx, float(best_score)
+        return self._select_precomputed(self._context_vector(context), candidate_arms)
 
     def update(
         self,
@@ -232,29 +326,72 @@ class LinUCBBandit:
             candidate: The candidate that was shown.
             reward: Observed reward (0-1).
         """
-        context_2d = self._ensure_context_shape(context)
-        arm = self._get_arm_from_candidate(candidate)
+        self.record(context, candidate, reward)
+        self.fit_pending()
+
+    def record(
+        self,
+        context: np.ndarray,
+        candidate: dict,
+        reward: float,
+    ) -> None:
+        """
+        Buffer an observed reward; fit_pending() applies buffered rewards.
 
+        Args:
+            context: Context feature vector.
+            candidate: The candidate that was shown.
+            reward: Observed reward (0-1).
+        """
+        arm = self._get_arm_from_candidate(candidate)
         # Use continuous reward directly
-        decision = arm
+        # Copy: _context_vector may return the caller's array, and it is held
+        # until the next flush
+        self._pending.append((arm, self._context_vector(context).copy(), reward))
 
-        if not self._is_fitted:
-            # First fit
-            self.mab.fit(
-                decisions=[decision],
-                rewards=[reward],
-                contexts=context_2d,
-            )
-            self._is_fitted = True
-        else:
-            # Incremental update
-            self.mab.partial_fit(
-                decisions=[decision],
-                rewards=[reward],
-                contexts=context_2d,
-            )
+    def fit_pending(self) -> None:
+        """Fold all buffered rewards into the model in one batch."""
+        if not self._pending:
+            return
+
+        decisions, contexts, rewards = zip(*self._pending)
+        self._fit_batch(decisions, np.array(rewards), np.vstack(contexts))
+        self.n_updates += len(self._pending)
+        self._pending.clear()
+
+    def _fit_batch(
+        self, decisions: Sequence[str], rewards: np.ndarray, contexts: np.ndarray
+    ) -> None:
+        """
+        Add a batch of (decision, reward, context) rows to the arm models.
+
+        Per arm with m new rows X, A^-1 is updated with the Woodbury identity
+        (A + X^T X)^-1 = A^-1 - A^-1 X^T (I_m + X A^-1 X^T)^-1 X A^-1, which
+        only solves an m x m system; m = 1 is the Sherman-Morrison update.
+        """
+        decisions_arr = np.asarray(decisions)
+        # Only arms that received rows; unknown arms are ignored
+        for arm in np.unique(decisions_arr).tolist():
+            k = self._arm_index.get(arm)
+            if k is None:
+                continue
+            mask = decisions_arr == arm
+            X = contexts[mask].astype(np.float64)
+
+            # Stored in float32 but updated in float64, so rounding doesn't
+            # compound inside the update itself
+            A_inv = self._A_inv[k].astype(np.float64)
+            # A^-1 is symmetric, so X A^-1 is (A^-1 X^T)^T
+            X_A_inv = X @ A_inv
+            S = np.identity(len(X)) + X_A_inv @ X.T
+            A_inv -= X_A_inv.T @ np.linalg.solve(S, X_A_inv)
+            b = self._b[k] + X.T @ rewards[mask]
+
+            self._A_inv[k] = A_inv
+            self._b[k] = b
+            self._theta[k] = A_inv @ b
 
-        self.n_updates += 1
+        self._is_fitted = True
 
     def warm_start(
         self, decisions: list[str], rewards: list[float], contexts: np.ndarray
@@ -270,45 +407,101 @@ class LinUCBBandit:
         if len(decisions) == 0:
             return
 
-        self.mab.fit(
-            decisions=decisions,
-            rewards=rewards,
-            contexts=contexts,
+        # Refit from scratch on the given history; rewards buffered before
+        # the reset would have been wiped by it too
+        self._reset_arms()
+        self._pending.clear()
+        self._fit_batch(
+            decisions,
+            np.asarray(rewards, dtype=np.float64),
+            np.asarray(contexts, dtype=np.float64).reshape(len(decisions), -1),
         )
-        self._is_fitted = True
         self.n_updates = len(decisions)
 
     def serialize(self) -> bytes:
-        """Serialize the bandit model to bytes."""
-        data = {
-            "arms": self.arms,
-            "alpha": self.alpha,
-            "context_dim": self.context_dim,
-            "n_updates": self.n_updates,
-            "is_fitted": self._is_fitted,
-            "mab": self.mab if self._is_fitted else None,
-        }
-        buffer = io.BytesIO()
-        joblib.dump(data, buffer)
-        buffer.seek(0)
-        return buffer.read()
+        """
+        Serialize the bandit model to bytes.
+
+        Layout: PAYLOAD_MAGIC, a little-endian uint32 header length, a JSON
+        header (metadata and arms), then the zlib-compressed little-endian
+        float32 A_inv, b and theta stacks. Loading it unpickles nothing.
+        """
+        header = json.dumps(
+            {
+                "format": SERIALIZATION_FORMAT,
+                "arms": self.arms,
+                "alpha": self.alpha,
+                "context_dim": self.context_dim,
+                "n_updates": self.n_updates,
+                "is_fitted": self._is_fitted,
+                "l2_lambda": self.l2_lambda,
+            }
+        ).encode()
+        # Untouched arms are still the scaled identity, so this compresses well
+        body = zlib.compress(
+            b"".join(
+                stack.astype(_PAYLOAD_DTYPE, copy=False).tobytes()
+                for stack in (self._A_inv, self._b, self._theta)
+            ),
+            1,
+        )
+        return PAYLOAD_MAGIC + struct.pack("<I", len(header)) + header + body
 
     @classmethod
     def deserialize(cls, data: bytes) -> "LinUCBBandit":
-        """Deserialize a bandit model from bytes."""
-        buffer = io.BytesIO(data)
-        loaded_data = joblib.load(buffer)
+        """Deserialize a bandit model from bytes (current or legacy joblib)."""
+        if data[: len(PAYLOAD_MAGIC)] == PAYLOAD_MAGIC:
+            loaded_data = cls._parse_payload(data)
+        else:
+            loaded_data = joblib.load(io.BytesIO(data))
         bandit = cls(
             arms=loaded_data["arms"],
             alpha=loaded_data["alpha"],
             context_dim=loaded_data["context_dim"],
+            l2_lambda=loaded_data.get("l2_lambda", 1.0),
         )
         bandit.n_updates = loaded_data.get("n_updates", 0)
         bandit._is_fitted = loaded_data.get("is_fitted", False)
-        if loaded_data.get("mab") is not None:
-            bandit.mab = loaded_data["mab"]
+        if loaded_data.get("A_inv") is not None:
+            # Keep the stacks contiguous STATE_DTYPE so arm scoring stays one
+            # vectorized pass however the payload was written (older
+            # payloads stored float64)
+            bandit._A_inv = np.ascontiguousarray(loaded_data["A_inv"], STATE_DTYPE)
+            bandit._b = np.ascontiguousarray(loaded_data["b"], STATE_DTYPE)
+            bandit._theta = np.ascontiguousarray(loaded_data["theta"], STATE_DTYPE)
+        elif loaded_data.get("mab") is not None:
+            bandit._load_mabwiser_state(loaded_data["mab"])
         return bandit
 
+    @staticmethod
+    def _parse_payload(data: bytes) -> dict[str, Any]:
+        """Split a serialize() payload into its metadata and arm stacks."""
+        offset = len(PAYLOAD_MAGIC)
+        (header_len,) = struct.unpack_from("<I", data, offset)
+        offset += 4
+        loaded_data = json.loads(data[offset : offset + header_len])
+
+        n_arms, d = len(loaded_data["arms"]), loaded_data["context_dim"]
+        # bytearray so the arrays viewing it are writable
+        flat = np.frombuffer(
+            bytearray(zlib.decompress(data[offset + header_len :])),
+            dtype=_PAYLOAD_DTYPE,
+        )
+        a_size = n_arms * d * d
+        loaded_data["A_inv"] = flat[:a_size].reshape(n_arms, d, d)
+        loaded_data["b"] = flat[a_size : a_size + n_arms * d].reshape(n_arms, d)
+        loaded_data["theta"] = flat[a_size + n_arms * d :].reshape(n_arms, d)
+        return loaded_data
+
+    def _load_mabwiser_state(self, mab: Any) -> None:
+        """Copy per-arm A^-1 and b out of a pickled MABWiser LinUCB model."""
+        for arm, model in mab._imp.arm_to_model.items():
+            k = self._arm_index.get(arm)
+            if k is not None and model.A_inv is not None:
+                self._A_inv[k] = model.A_inv
+                self._b[k] = model.Xty
+                self._theta[k] = model.A_inv @ model.Xty
+
     def to_dict(self) -> dict:
         """Serialize bandit state (metadata only, for backward compat)."""
         return {
@@ -342,7 +535,13 @@ class HierarchicalBandit:
 
     Models are stored in PostgreSQL for persistence.
     User models are cached in an LRU cache with configurable size.
-    Persistence is batched to reduce DB load.
+    Persistence is batched to reduce DB load, and rewards are fitted in the
+    same batches (Batch LinUCB): a model learns from new feedback when it is
+    next flushed, every flush_threshold updates.
+
+    Thread-safe: public methods hold one reentrant lock, since selection,
+    updates, LRU eviction and flushes all touch the same models and run on
+    threadpool workers (request handlers and background tasks) concurrently.
     """
 
     def __init__(
@@ -365,6 +564,10 @@ class HierarchicalBandit:
         self.min_user_updates = min_user_updates
         self.flush_threshold = flush_threshold
 
+        # Reentrant: select/update -> LRU eviction -> save, and update ->
+        # _flush_dirty, run while the lock is already held
+        self._lock = threading.RLock()
+
         # Global model (always in memory)
         self.global_model = self._load_global_from_db()
 
@@ -382,33 +585,55 @@ class HierarchicalBandit:
         print(f"   Cache size: {cache_size}, flush threshold: {flush_threshold}")
 
     def _save_to_db(self, model_id: str, bandit: LinUCBBandit) -> None:
-        """Save a bandit model to the database (base64 encoded)."""
-        import base64
+        """Fit any buffered rewards, then save the model (raw bytea)."""
+        self._save_batch([(model_id, bandit)])
+
+    def _save_batch(self, models: Sequence[tuple[str, LinUCBBandit]]) -> None:
+        """
+        Fit buffered rewards and upsert several models in one transaction.
+
+        All rows go in a single INSERT ... ON CONFLICT statement over one
+        pooled connection, so a flush costs one round trip, not one per model.
+
+        Args:
+            models: (model_id, bandit) pairs with distinct model ids.
+        """
+        if not models:
+            return
+
+        now = datetime.utcnow()
+        rows = []
+        for model_id, bandit in models:
+            bandit.fit_pending()
+            rows.append(
+                (model_id, psycopg2.Binary(bandit.serialize()), bandit.n_updates, now)
+            )
+        # Consistent row order keeps concurrent flushes from deadlocking
+        rows.sort(key=lambda row: row[0])
 
-        model_data = base64.b64encode(bandit.serialize()).decode("utf-8")
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
-            cursor.execute(
+            execute_values(
+                cursor,
                 """
                 INSERT INTO bandit_models (model_id, model_data, n_updates, updated_at)
-                VALUES (%s, %s, %s, %s)
+                VALUES %s
                 ON CONFLICT (model_id) 
                 DO UPDATE SET model_data = EXCLUDED.model_data, 
                               n_updates = EXCLUDED.n_updates, 
                               updated_at = EXCLUDED.updated_at
             """,
-                (model_id, model_data, bandit.n_updates, datetime.utcnow()),
+                rows,
+                page_size=len(rows),
             )
             conn.commit()
         finally:
             cursor.close()
-            conn.close()
+            put_db_connection(conn)
 
     def _load_from_db(self, model_id: str) -> LinUCBBandit | None:
-        """Load a bandit model from the database (base64 decoded)."""
-        import base64
-
+        """Load a bandit model from the database (raw bytea)."""
         conn = get_db_connection()
         cursor = conn.cursor()
         try:
@@ -422,15 +647,15 @@ class HierarchicalBandit:
             )
             row = cursor.fetchone()
             if row:
-                model_data_b64, n_updates = row
-                model_data = base64.b64decode(model_data_b64)
-                bandit = LinUCBBandit.deserialize(model_data)
+                model_data, n_updates = row
+                # psycopg2 returns bytea as a memoryview
+                bandit = LinUCBBandit.deserialize(bytes(model_data))
                 bandit.n_updates = n_updates
                 return bandit
             return None
         finally:
             cursor.close()
-            conn.close()
+            put_db_connection(conn)
 
     def _load_global_from_db(self) -> LinUCBBandit:
         """Load global model from DB or create new one."""
@@ -472,27 +697,42 @@ class HierarchicalBandit:
         Returns:
             LinUCBBandit for this user.
         """
-        # Check cache first
-        cached = self.user_models.get(user_id)
-        if cached is not None:
-            return cached
+        with self._lock:
+            # Check cache first
+            cached = self.user_models.get(user_id)
+            if cached is not None:
+                return cached
+
+            # Try load from DB
+            loaded = self._load_user_from_db(user_id)
+            if loaded:
+                self.user_models.set(user_id, loaded)
+                return loaded
 
-        # Try load from DB
-        loaded = self._load_user_from_db(user_id)
-        if loaded:
-            self.user_models.set(user_id, loaded)
-            return loaded
+            # Create new
+            new_model = LinUCBBandit(alpha=self.alpha)
+            self.user_models.set(user_id, new_model)
+            return new_model
 
-        # Create new
-        new_model = LinUCBBandit(alpha=self.alpha)
-        self.user_models.set(user_id, new_model)
-        return new_model
+    def predict_global(self, context: np.ndarray) -> dict[str, float]:
+        """
+        Score every arm with the global model.
+
+        Args:
+            context: Context feature vector.
+
+        Returns:
+            Dict of arm -> UCB score.
+        """
+        with self._lock:
+            return self.global_model.predict_expectations(context)
 
     def select(
         self,
         user_id: str,
         context: np.ndarray,
         candidates: list[dict],
+        candidate_arms: Sequence[str] | None = None,
     ) -> tuple[int, float]:
         """
         Select the best candidate using hierarchical bandit.
@@ -501,40 +741,53 @@ class HierarchicalBandit:
             user_id: User identifier.
             context: Context feature vector.
             candidates: List of candidate content items.
+            candidate_arms: Arm of each candidate, if the caller already
+                mapped them (e.g. to group candidates by arm).
 
         Returns:
             Tuple of (selected_index, bandit_score).
         """
-        if not candidates:
-            raise ValueError("No candidates provided")
+        with self._lock:
+            if not candidates:
+                raise ValueError("No candidates provided")
 
-        # Try global model first
-        try:
-            global_idx, global_score = self.global_model.select(context, candidates)
-        except Exception as e:
-            print(f"Global model selection error: {e}")
-            import random
+            # Try global model first. The context vector and candidate arms are
+            # the same for both models, so build them once.
+            try:
+                x = self.global_model._context_vector(context)
+                if candidate_arms is None:
+                    candidate_arms = [
+                        self.global_model._get_arm_from_candidate(c) for c in candidates
+                    ]
+                global_idx, global_score = self.global_model._select_precomputed(
+                    x, candidate_arms
+                )
+            except Exception as e:
+                print(f"Global model selection error: {e}")
+                import random
 
-            return random.randint(0, len(candidates) - 1), 0.5
+                return random.randint(0, len(candidates) - 1), 0.5
 
-        # Get user model
-        user_model = self.get_user_model(user_id)
+            # Get user model
+            user_model = self.get_user_model(user_id)
 
-        # Blend if user has enough history
-        if user_model.n_updates >= self.min_user_updates:
-            try:
-                user_idx, user_score = user_model.select(context, candidates)
+            # Blend if user has enough history
+            if user_model.n_updates >= self.min_user_updates:
+                try:
+                    user_idx, user_score = user_model._select_precomputed(
+                        x, candidate_arms
+                    )
 
-                # Calculate blend weight
-                blend = min(user_model.n_updates / 50, 0.7)
+                    # Calculate blend weight
+                    blend = min(user_model.n_updates / 50, 0.7)
 
-                # Use weighted selection
-                if user_score * blend > global_score * (1 - blend):
-                    return user_idx, user_score
-            except Exception:
-                pass
+                    # Use weighted selection
+                    if user_score * blend > global_score * (1 - blend):
+                        return user_idx, user_score
+                except Exception:
+                    pass
 
-        return global_idx, global_score
+            return global_idx, global_score
 
     def update(
         self,
@@ -555,25 +808,29 @@ class HierarchicalBandit:
             candidate: The candidate that was shown.
             reward: Observed reward (0-1).
         """
-        # Update global model
-        try:
-            self.global_model.update(context, candidate, reward)
-            self._dirty_global = True
-        except Exception as e:
-            print(f"Global model update error: {e}")
+        with self._lock:
+            # Rewards are buffered on each model and fitted as one batch when the
+            # model is persisted (see _save_to_db)
 
-        # Update per-user model
-        try:
-            user_model = self.get_user_model(user_id)
-            user_model.update(context, candidate, reward)
-            self._dirty_users.add(user_id)
-        except Exception as e:
-            print(f"User model update error: {e}")
+            # Update global model
+            try:
+                self.global_model.record(context, candidate, reward)
+                self._dirty_global = True
+            except Exception as e:
+                print(f"Global model update error: {e}")
 
-        # Increment counter and maybe flush
-        self._update_count += 1
-        if self._update_count >= self.flush_threshold:
-            self._flush_dirty()
+            # Update per-user model
+            try:
+                user_model = self.get_user_model(user_id)
+                user_model.record(context, candidate, reward)
+                self._dirty_users.add(user_id)
+            except Exception as e:
+                print(f"User model update error: {e}")
+
+            # Increment counter and maybe fit + flush
+            self._update_count += 1
+            if self._update_count >= self.flush_threshold:
+                self._flush_dirty()
 
     def _flush_dirty(self) -> None:
         """
@@ -582,25 +839,30 @@ class HierarchicalBandit:
         Called automatically every flush_threshold updates,
         on LRU eviction, and on shutdown.
         """
-        # Flush global if dirty
-        if self._dirty_global:
+        with self._lock:
+            # Persisting isn't a use, so peek rather than get to leave the LRU
+            # order untouched
+            dirty_users = [
+                (user_id, cached)
+                for user_id in self._dirty_users
+                if (cached := self.user_models.peek(user_id)) is not None
+            ]
+            models = [(f"user_{user_id}", cached) for user_id, cached in dirty_users]
+            if self._dirty_global:
+                models.append(("global", self.global_model))
+
+            # Global and dirty users go out in one batch; on failure they all
+            # stay dirty and are retried on the next flush
             try:
-                self._save_to_db("global", self.global_model)
-                self._dirty_global = False
+                self._save_batch(models)
             except Exception as e:
-                print(f"Error saving global model: {e}")
-
-        # Flush dirty users
-        for user_id in list(self._dirty_users):
-            cached = self.user_models.get(user_id)
-            if cached is not None:
-                try:
-                    self._save_to_db(f"user_{user_id}", cached)
+                print(f"Error saving dirty bandit models: {e}")
+            else:
+                self._dirty_global = False
+                for user_id, _ in dirty_users:
                     self._dirty_users.discard(user_id)
-                except Exception as e:
-                    print(f"Error saving user {user_id} model: {e}")
 
-        self._update_count = 0
+            self._update_count = 0
 
     def warm_start_user(
         self,
@@ -616,34 +878,35 @@ class HierarchicalBandit:
             selected_items: List of items user selected during onboarding.
             context: Optional context (uses neutral context if not provided).
         """
-        if not selected_items:
-            return
+        with self._lock:
+            if not selected_items:
+                return
 
-        if context is None:
-            # Neutral context
-            context = np.zeros(CONTEXT_DIM)
-            context[0] = 0.3  # Neutral stress
-            context[5] = 1.0  # Neutral emotion
+            if context is None:
+                # Neutral context
+                context = np.zeros(CONTEXT_DIM)
+                context[0] = 0.3  # Neutral stress
+                context[5] = 1.0  # Neutral emotion
 
-        user_model = self.get_user_model(user_id)
+            user_model = self.get_user_model(user_id)
 
-        # Build training data from selections
-        decisions = []
-        rewards = []
-        contexts = []
+            # Build training data from selections
+            decisions = []
+            rewards = []
+            contexts = []
 
-        for item in selected_items:
-            arm = user_model._get_arm_from_candidate(item)
-            decisions.append(arm)
-            rewards.append(1)  # Selection = positive
-            contexts.append(context)
+            for item in selected_items:
+                arm = user_model._get_arm_from_candidate(item)
+                decisions.append(arm)
+                rewards.append(1)  # Selection = positive
+                contexts.append(context)
 
-        if decisions:
-            contexts_array = np.array(contexts)
-            user_model.warm_start(decisions, rewards, contexts_array)
-            # Warm start is important, save immediately
-            self._save_to_db(f"user_{user_id}", user_model)
-            self._dirty_users.discard(user_id)  # Just saved, not dirty
+            if decisions:
+                contexts_array = np.array(contexts)
+                user_model.warm_start(decisions, rewards, contexts_array)
+                # Warm start is important, save immediately
+                self._save_to_db(f"user_{user_id}", user_model)
+                self._dirty_users.discard(user_id)  # Just saved, not dirty
 
     def close(self) -> None:
         """
@@ -652,19 +915,24 @@ class HierarchicalBandit:
         Flushes all dirty models to DB and saves any remaining cached models.
         Should be called on server shutdown.
         """
-        # First, flush all dirty models
-        self._flush_dirty()
+        with self._lock:
+            # First, flush all dirty models
+            self._flush_dirty()
 
-        # Then save any remaining cached models (safety net)
-        for user_id, model in self.user_models.items():
+            # Then save any remaining cached models (safety net)
             try:
-                self._save_to_db(f"user_{user_id}", model)
+                self._save_batch(
+                    [
+                        (f"user_{user_id}", model)
+                        for user_id, model in self.user_models.items()
+                    ]
+                )
             except Exception as e:
-                print(f"Error saving user {user_id} on close: {e}")
+                print(f"Error saving cached user models on close: {e}")
 
-        # Clear dirty tracking
-        self._dirty_users.clear()
-        self._dirty_global = False
+            # Clear dirty tracking
+            self._dirty_users.clear()
+            self._dirty_global = False
 
 
 def build_context_features(
@@ -685,32 +953,27 @@ def build_context_features(
     Returns:
         Context feature vector (12 dimensions).
     """
-    features = []
+    # Remaining slots stay 0.0 as padding
+    features = np.zeros(CONTEXT_DIM, dtype=np.float32)
 
     # Stress (1 feature)
-    features.append(stress_score)
+    features[0] = stress_score
 
     # Emotion one-hot (7 features)
-    emotions = ["anger", "fear", "joy", "love", "neutral", "sadness", "surprise"]
-    for e in emotions:
-        features.append(1.0 if emotion == e else 0.0)
+    emotion_idx = _EMOTION_INDEX.get(emotion)
+    if emotion_idx is not None:
+        features[emotion_idx] = 1.0
 
     # User's historical positive rate (1 feature)
-    features.append(user_positive_rate)
+    features[8] = user_positive_rate
 
     # Birth Year (Normalized) (1 feature)
     # Normalize around 2000 with a scale of 40 years (range ~1960-2040)
+    # (unknown -> 0.0, i.e. 2000)
     if birth_year:
-        norm_birth_year = (birth_year - 2000) / 40.0
-    else:
-        norm_birth_year = 0.0  # Default to 2000
-    features.append(norm_birth_year)
+        features[9] = (birth_year - 2000) / 40.0
 
-    # Pad to CONTEXT_DIM
-    while len(features) < CONTEXT_DIM:
-        features.append(0.0)
-
-    return np.array(features[:CONTEXT_DIM], dtype=np.float32)
+    return features
 
 
 def calculate_reward(
@@ -826,17 +1089,30 @@ def normalize_movie_genre(raw: str) -> str:
     # Handle both string and list formats
     if isinstance(raw, list):
         first_genre = raw[0].lower().strip() if raw else ""
-    else:
-        first_genre = str(raw).split("|")[0].lower().strip()
-    return MOVIE_GENRE_MAP.get(first_genre, "other_movie")
+        return MOVIE_GENRE_MAP.get(first_genre, "other_movie")
+    return _movie_genre_arm(str(raw))
 
 
 def normalize_song_genre(raw: str) -> str:
     """Normalize song genre to one of 6 categories."""
     if not raw:
         return "other_song"
-    genre = str(raw).lower().strip()
-    return SONG_GENRE_MAP.get(genre, "other_song")
+    return _song_genre_arm(str(raw))
+
+
+# Candidate pools repeat a small set of raw genre strings, so the string
+# work is memoized per distinct value
+@functools.lru_cache(maxsize=4096)
+def _movie_genre_arm(raw: str) -> str:
+    """Arm for a pipe-separated movie genre string (first genre wins)."""
+    first_genre = raw.split("|")[0].lower().strip()
+    return MOVIE_GENRE_MAP.get(first_genre, "other_movie")
+
+
+@functools.lru_cache(maxsize=4096)
+def _song_genre_arm(raw: str) -> str:
+    """Arm for a song genre string."""
+    return SONG_GENRE_MAP.get(raw.lower().strip(), "other_song")
 
 
 # =============================================================================
@@ -959,3 +1235,64 @@ def nostalgia_score(
     final = personal * (0.7 + 0.3 * pop_score) + cultural
 
     return round(min(1.0, max(0.0, final)), 3)
+
+
+def nostalgia_score_vec(
+    birth_year: int,
+    release_years: np.ndarray,
+    rating_counts: np.ndarray,
+    max_count: float,
+    use_linear: bool = False,
+    target_period: tuple[int, int] | None = None,
+) -> np.ndarray:
+    """
+    Vectorized nostalgia_score over a batch of candidates.
+
+    Same formula as nostalgia_score, evaluated with NumPy so scoring a
+    candidate list is a handful of array operations instead of one Python
+    call per item.
+
+    Args:
+        birth_year: User's birth year
+        release_years: Content release years (NaN where unknown)
+        rating_counts: Number of ratings (or popularity) per item
+        max_count: Maximum rating count in dataset
+        use_linear: If True, use linear scaling (value/max) instead of log scaling.
+        target_period: Optional (start_year, end_year) tuple for explicit user preference.
+
+    Returns:
+        Nostalgia scores (0-1), 0.0 where the release year is unknown
+    """
+    years = np.asarray(release_years, dtype=np.float64)
+    counts = np.asarray(rating_counts, dtype=np.float64)
+
+    if max_count <= 0:
+        pop_score = np.zeros_like(counts)
+    elif use_linear:
+        pop_score = np.minimum(1.0, counts / max_count)
+    else:
+        pop_score = np.where(
+            counts > 0, np.log1p(np.maximum(counts, 0.0)) / math.log1p(max_count), 0.0
+        )
+
+    if target_period:
+        start, end = target_period
+        mid_year = (start + end) / 2
+        width = max(5.0, (end - start) / 2.0)
+        personal = np.exp(-((years - mid_year) ** 2) / (2 * width**2))
+        cultural = 0.0
+    else:
+        # Same defaults as age_nostalgia
+        peak_age, width, prebirth_decay = 13.0, 8.0, 0.03
+        age_at_release = years - birth_year
+        birth_score = math.exp(-((0 - peak_age) ** 2) / (2 * width**2))
+        personal = np.where(
+            age_at_release >= 0,
+            np.exp(-((age_at_release - peak_age) ** 2) / (2 * width**2)),
+            birth_score * np.exp(-prebirth_decay * np.abs(age_at_release)),
+        )
+        cultural = np.where(age_at_release < 0, pop_score * 0.4, 0.0)
+
+    final = personal * (0.7 + 0.3 * pop_score) + cultural
+    scores = np.round(np.clip(final, 0.0, 1.0), 3)
+    return np.where(np.isnan(years), 0.0, scores)
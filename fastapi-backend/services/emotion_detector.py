@@ -5,17 +5,18 @@ This module provides emotion prediction from text input using a
 multi-label classification model trained on the Cirimus/Super-Emotion dataset.
 """
 
-from typing import Any, Dict
+from typing import Any, Dict, List
 
 import torch
 from transformers import AutoModelForSequenceClassification, AutoTokenizer
 
+from core.schemas import EMOTION_LABELS
+
 
 class EmotionDetector:
     """Emotion detection using a fine-tuned DistilRoBERTa model."""
 
-    LABELS = ["anger", "fear", "joy", "love", "neutral", "sadness", "surprise"]
-    THRESHOLD = 0.56  # Optimized threshold from training analysis
+    LABELS = EMOTION_LABELS
 
     def __init__(self, use_mock: bool = False) -> None:
         """
@@ -66,18 +67,33 @@ class EmotionDetector:
             Dictionary containing:
                 - emotion: The dominant emotion label (str)
                 - confidence: Score of the dominant emotion (float)
-                - probabilities: Dictionary of all emotion scores (dict[str, float])
+                - probabilities: Scores in LABELS order (list[float])
         """
-        if self.use_mock:
-            return {
-                "emotion": "neutral",
-                "confidence": 0.5,
-                "probabilities": {label: 0.1 for label in self.LABELS},
-            }
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: List[str]) -> List[Dict[str, Any]]:
+        """
+        Predict emotions for several texts in one forward pass.
 
-        # Tokenize input
+        Args:
+            texts: Input texts to analyze.
+
+        Returns:
+            One result per text, in order, shaped like predict()'s.
+        """
+        if self.use_mock:
+            return [
+                {
+                    "emotion": "neutral",
+                    "confidence": 0.5,
+                    "probabilities": [0.1] * len(self.LABELS),
+                }
+                for _ in texts
+            ]
+
+        # Tokenize input (padded to the longest text in the batch)
         inputs = self.tokenizer(
-            text,
+            texts,
             return_tensors="pt",
             truncation=True,
             max_length=512,
@@ -94,38 +110,20 @@ class EmotionDetector:
 
         # Apply sigmoid to get multi-label probabilities
         # (Model was trained with BCEWithLogitsLoss for multi-label)
-        probabilities = torch.sigmoid(logits).cpu().numpy()[0]
-
-        # Create probability dictionary
-        prob_dict = {
-            label: float(score) for label, score in zip(self.LABELS, probabilities)
-        }
-
-        # Determine dominant emotion based on threshold
-        # We pick the highest score that exceeds threshold, or just highest if none do
-        # Or simply argmax?
-        # The notebook used: y_pred_new = (probs > THRESHOLD).astype(int)
-        # But for a single label return, we usually want the *best* one.
-
-        # Strategy:
-        # 1. Filter by threshold
-        # 2. If valid candidates, pick max
-        # 3. If no valid candidates, pick "neutral" or max (fallback)
-
-        valid_emotions = {k: v for k, v in prob_dict.items() if v >= self.THRESHOLD}
-
-        if valid_emotions:
-            dominant_emotion, confidence = max(
-                valid_emotions.items(), key=lambda x: x[1]
+        batch_probabilities = torch.sigmoid(logits).cpu().numpy().tolist()
+
+        # Single-label result: the most probable emotion
+        results = []
+        for probabilities in batch_probabilities:
+            best = max(range(len(probabilities)), key=probabilities.__getitem__)
+            results.append(
+                {
+                    "emotion": self.LABELS[best],
+                    "confidence": probabilities[best],
+                    "probabilities": probabilities,
+                }
             )
-        else:
-            dominant_emotion, confidence = max(prob_dict.items(), key=lambda x: x[1])
-
-        return {
-            "emotion": dominant_emotion,
-            "confidence": confidence,
-            "probabilities": prob_dict,
-        }
+        return results
 
     def close(self) -> None:
         """Clean up resources."""
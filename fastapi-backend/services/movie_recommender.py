@@ -17,23 +17,24 @@ Usage:
     )
 """
 
+import datetime
 import json
 import os
-from pathlib import Path
-from typing import Optional
+import sys
+from typing import Any, Optional, Sequence
 
 import joblib
 import numpy as np
 import pandas as pd
 import psycopg2
-from dotenv import load_dotenv
 
-# Paths (services/ -> fastapi-backend/ -> project_root/)
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-ENV_FILE = PROJECT_ROOT / ".env"
+from core.cache import TTLCache
+from core.db import get_db_connection, put_db_connection
+from core.env import load_env
+from core.schemas import MovieInfo
 
 # Load environment variables
-load_dotenv(ENV_FILE)
+load_env()
 
 # Database configuration
 DATABASE_URL = os.getenv(
@@ -70,7 +71,22 @@ class MovieRecommender:
         # Mappings
         self._user_id_map = {}
         self._item_id_map = {}
-        self._old_movie_cache = {"internal_ids": [], "movie_ids": [], "metadata": {}}
+        self._old_movie_cache = {
+            "internal_ids": np.empty(0, dtype=np.int32),
+            "movie_ids": np.empty(0, dtype=np.int32),
+            "years": np.empty(0, dtype=np.int32),
+            "metadata": {},
+        }
+
+        # movieId -> (info dict, MovieInfo response model). Popular movies are
+        # looked up over and over (detail pages, seeds); the TTL bounds
+        # staleness after catalog edits.
+        self._movie_info_cache = TTLCache(maxsize=10_000, ttl=3600)
+
+        # (today_ordinal, min_years_old) -> (internal_ids, movie_ids)
+        self._age_filter_cache: dict[
+            tuple[int, int], tuple[np.ndarray, np.ndarray]
+        ] = {}
 
         # Load model artifacts
         repo_id = os.getenv("HF_REPO_ID")
@@ -113,6 +129,16 @@ class MovieRecommender:
             self._internal_to_movie = {v: k for k, v in self._item_id_map.items()}
             self.n_items = len(self._item_id_map)
 
+            # Item representations are fixed for a trained model; compute them
+            # once so scoring is a single contiguous float32 GEMV per request
+            item_biases, item_embeddings = self.model.get_item_representations(
+                features=self.item_features
+            )
+            self._item_biases = np.ascontiguousarray(item_biases, dtype=np.float32)
+            self._item_embeddings = np.ascontiguousarray(
+                item_embeddings, dtype=np.float32
+            )
+
             # Build cache
             self._old_movie_cache = self._build_old_movie_cache()
 
@@ -121,25 +147,37 @@ class MovieRecommender:
             raise
 
     def _get_connection(self) -> psycopg2.extensions.connection:
-        """Get a new database connection."""
+        """
+        Check out a database connection. Return it with _release_connection().
+
+        Connections to the default database come from the shared pool in
+        core.db; a custom database_url gets a dedicated connection.
+        """
+        if self.database_url == DATABASE_URL:
+            return get_db_connection()
         return psycopg2.connect(self.database_url)
 
+    def _release_connection(self, conn: psycopg2.extensions.connection) -> None:
+        """Return a connection from _get_connection() to the pool, or close it."""
+        if self.database_url == DATABASE_URL:
+            put_db_connection(conn)
+        else:
+            conn.close()
+
     def close(self) -> None:
-        """Close the database connection (No-op as we use per-request connections)."""
+        """Close the database connection (No-op; the pool is closed on shutdown)."""
         pass
 
-    def _build_old_movie_cache(self, min_years_old: int = 10) -> dict:
+    def _build_old_movie_cache(self) -> dict:
         """
-        Pre-compute cache of old movies for fast filtering.
-        Called once at startup.
+        Pre-compute cache of dated movies for fast filtering.
+        Called once at startup; the age cut-off is applied per request
+        through _age_filtered_items.
 
         Returns:
-            Dict with 'internal_ids' (numpy array), 'movie_ids', and 'metadata'
+            Dict with 'internal_ids', 'movie_ids', 'years' (numpy arrays)
+            and 'metadata'
         """
-        import datetime
-
-        max_year = datetime.datetime.now().year - min_years_old
-
         conn = self._get_connection()
         try:
             cursor = conn.cursor()
@@ -148,9 +186,8 @@ class MovieRecommender:
                 """
                 SELECT id, title, year, genres, rating_count
                 FROM movies
-                WHERE year IS NOT NULL AND year <= %s;
-            """,
-                (max_year,),
+                WHERE year IS NOT NULL;
+            """
             )
 
             rows = cursor.fetchall()
@@ -159,7 +196,11 @@ class MovieRecommender:
             # Build cache with only movies that exist in our model
             internal_ids = []
             movie_ids = []
-            metadata = {}  # movie_id -> (title, year, genres, rating_count)
+            years = []
+            # movie_id -> (title, year, genres, decade, rating_count).
+            # genres/decade are formatted once and interned: there are only a
+            # few hundred distinct values, shared across all cached movies.
+            metadata = {}
 
             for row in rows:
                 movie_id = row[0]
@@ -167,20 +208,56 @@ class MovieRecommender:
                     internal_id = self._item_id_map[movie_id]
                     internal_ids.append(internal_id)
                     movie_ids.append(movie_id)
+                    years.append(row[2])
                     metadata[movie_id] = {
                         "title": row[1],
                         "year": row[2],
-                        "genres": row[3],
+                        "genres": sys.intern(self._format_genres(row[3])),
+                        "decade": sys.intern(self._calculate_decade(row[2])),
                         "rating_count": row[4] or 0,
                     }
 
             return {
                 "internal_ids": np.array(internal_ids, dtype=np.int32),
                 "movie_ids": np.array(movie_ids, dtype=np.int32),
+                "years": np.array(years, dtype=np.int32),
                 "metadata": metadata,
             }
         finally:
-            conn.close()
+            self._release_connection(conn)
+
+    def _age_filtered_items(
+        self, today_ordinal: int, min_years_old: int
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Cached movies that are at least min_years_old old.
+
+        The cut-off only moves once a day, so results are memoized per
+        (day, min_years_old) instead of filtering every year per request.
+
+        Args:
+            today_ordinal: date.today().toordinal(), the cache key's day
+            min_years_old: Minimum age of content in years
+
+        Returns:
+            Tuple of (internal_ids, movie_ids) arrays, aligned
+        """
+        key = (today_ordinal, min_years_old)
+        filtered = self._age_filter_cache.get(key)
+        if filtered is not None:
+            return filtered
+
+        # Entries from earlier days can never be hit again
+        for stale in list(self._age_filter_cache):
+            if stale[0] != today_ordinal:
+                self._age_filter_cache.pop(stale, None)
+
+        cache = self._old_movie_cache
+        max_year = datetime.date.fromordinal(today_ordinal).year - min_years_old
+        mask = cache["years"] <= max_year
+        filtered = (cache["internal_ids"][mask], cache["movie_ids"][mask])
+        self._age_filter_cache[key] = filtered
+        return filtered
 
     def _format_genres(self, genres_json: list[str] | str | None) -> str:
         """
@@ -237,62 +314,50 @@ class MovieRecommender:
                 print(f"Warning: movieId {mid} not found in training data, skipping.")
         return internal_ids
 
-    def _build_user_features_from_items(self, internal_props: list[dict]) -> np.ndarray:
+    def _build_user_features_from_items(
+        self, internal_ids: np.ndarray, timestamps: Sequence[Any]
+    ) -> np.ndarray:
         """
         Build a pseudo-user feature vector based on liked items with recency weighting.
 
         Args:
-            internal_props: List of dicts {internal_id, timestamp}
+            internal_ids: Internal item indices of the liked items
+            timestamps: When each item was liked (datetime, ISO string or None),
+                aligned with internal_ids
 
         Returns:
             User embedding vector
         """
-        if not internal_props:
+        if len(internal_ids) == 0:
             raise ValueError("No valid movie IDs provided for recommendations.")
 
-        import datetime
-
         now = datetime.datetime.now()
 
-        # Get item representations from the model
-        item_biases, item_embeddings = self.model.get_item_representations(
-            features=self.item_features
-        )
-
-        # Calculate weights
-        embeddings = []
-        weights = []
-
-        for prop in internal_props:
-            idx = prop["internal_id"]
-            embeddings.append(item_embeddings[idx])
-
-            timestamp = prop.get("timestamp")
+        # Days since each like; NaN where there is no timestamp
+        days = np.full(len(internal_ids), np.nan)
+        for i, timestamp in enumerate(timestamps):
             if timestamp:
                 if isinstance(timestamp, str):
                     try:
                         timestamp = datetime.datetime.fromisoformat(timestamp)
                     except ValueError:
                         timestamp = now
+                days[i] = max(0, (now - timestamp).days)
 
-                delta = now - timestamp
-                days = max(0, delta.days)
-                # Formula: 1 / (1 + 0.1 * days)
-                weight = 1.0 / (1.0 + 0.1 * days)
-                weight = max(weight, 0.2)  # Safety floor
-            else:
-                weight = 0.5
-
-            weights.append(weight)
+        # Formula: 1 / (1 + 0.1 * days), floored at 0.2; undated items get 0.5
+        weights = np.where(
+            np.isnan(days), 0.5, np.maximum(1.0 / (1.0 + 0.1 * days), 0.2)
+        ).astype(np.float32)
 
-        # Weighted Average
-        user_embedding = np.average(embeddings, axis=0, weights=weights)
+        # Weighted average as one BLAS vector-matrix product
+        user_embedding = (weights @ self._item_embeddings[internal_ids]) / weights.sum()
 
         return user_embedding
 
     def recommend(
         self,
-        liked_items: list[dict],
+        liked_item_ids: Sequence[int] | np.ndarray,
+        timestamps: Optional[Sequence[Any]] = None,
         n_recommendations: int = 10,
         exclude_liked: bool = True,
         min_years_old: int = 10,
@@ -301,7 +366,9 @@ class MovieRecommender:
         Generate movie recommendations for a new user based on movies they've liked.
 
         Args:
-            liked_items: List of dicts {"movieId": int, "timestamp": datetime}
+            liked_item_ids: MovieLens movieIds the user has liked
+            timestamps: When each movie was liked (datetime, ISO string or None),
+                aligned with liked_item_ids. Omit if unknown.
             n_recommendations: Number of recommendations to return
             exclude_liked: Whether to exclude liked movies from recommendations
             min_years_old: Minimum age of content in years (default 10 for nostalgia)
@@ -309,47 +376,41 @@ class MovieRecommender:
         Returns:
             DataFrame with recommended movies and their scores
         """
-        # Convert to internal IDs
-        internal_props = []
-        for item in liked_items:
-            mid = item["movieId"]
-            if mid in self._item_id_map:
-                internal_props.append(
-                    {
-                        "internal_id": self._item_id_map[mid],
-                        "timestamp": item.get("timestamp"),
-                    }
-                )
-            else:
+        # Convert to internal IDs, keeping timestamps aligned
+        internal_id_list: list[int] = []
+        known_timestamps: list[Any] = []
+        for i, mid in enumerate(liked_item_ids):
+            internal_id = self._item_id_map.get(int(mid))
+            if internal_id is None:
                 print(f"Warning: movieId {mid} not found in training data, skipping.")
+                continue
+            internal_id_list.append(internal_id)
+            known_timestamps.append(timestamps[i] if timestamps is not None else None)
 
-        if not internal_props:
+        if not internal_id_list:
             # Fallback if no valid history, return some popular movies
             return self._get_popular_fallback(
                 n_recommendations, min_years_old=min_years_old
             )
 
         # Build user embedding from liked items (weighted)
-        user_embedding = self._build_user_features_from_items(internal_props)
-
-        # Get item representations
-        item_biases, item_embeddings = self.model.get_item_representations(
-            features=self.item_features
+        internal_ids = np.asarray(internal_id_list, dtype=np.int32)
+        user_embedding = self._build_user_features_from_items(
+            internal_ids, known_timestamps
         )
 
-        # Calculate scores for all items using dot product (vectorized)
-        all_scores = item_embeddings.dot(user_embedding) + item_biases
+        # Score all items with one BLAS matrix-vector product
+        all_scores = self._item_embeddings @ user_embedding.astype(np.float32)
+        all_scores += self._item_biases
 
         # Create exclusion set for liked items
-        excluded_internal_ids = (
-            {prop["internal_id"] for prop in internal_props} if exclude_liked else set()
-        )
+        excluded_internal_ids = set(internal_id_list) if exclude_liked else set()
 
-        # OPTIMIZED: Use pre-computed cache for old movies
-        cache = self._old_movie_cache
-        internal_ids = cache["internal_ids"]
-        movie_ids = cache["movie_ids"]
-        metadata = cache["metadata"]
+        # OPTIMIZED: Use pre-computed cache, restricted to old-enough movies
+        internal_ids, movie_ids = self._age_filtered_items(
+            datetime.date.today().toordinal(), min_years_old
+        )
+        metadata = self._old_movie_cache["metadata"]
 
         # Vectorized score lookup using NumPy fancy indexing
         old_scores = all_scores[internal_ids]
@@ -361,8 +422,15 @@ class MovieRecommender:
             )
             old_scores = np.where(exclude_mask, old_scores, -np.inf)
 
-        # Get top N indices using partial sort (argsort is fast for this)
-        top_indices = np.argsort(-old_scores)[:n_recommendations]
+        # Top N: partition in O(N), then sort only those N
+        neg_scores = -old_scores
+        if n_recommendations < len(neg_scores):
+            top_indices = np.argpartition(neg_scores, n_recommendations)[
+                :n_recommendations
+            ]
+            top_indices = top_indices[np.argsort(neg_scores[top_indices])]
+        else:
+            top_indices = np.argsort(neg_scores)
 
         # Build results
         results = []
@@ -376,9 +444,9 @@ class MovieRecommender:
                         "movieId": mid,
                         "title": meta["title"],
                         "year": meta["year"],
-                        "genres": self._format_genres(meta["genres"]),
+                        "genres": meta["genres"],
                         "rating_count": meta["rating_count"],
-                        "decade": self._calculate_decade(meta["year"]),
+                        "decade": meta["decade"],
                         "score": score,
                     }
                 )
@@ -392,8 +460,6 @@ class MovieRecommender:
             cursor = conn.cursor()
 
             # Calculate max year
-            import datetime
-
             current_year = datetime.date.today().year
             max_year = current_year - min_years_old
 
@@ -443,7 +509,7 @@ class MovieRecommender:
                 )
             return pd.DataFrame(results)
         finally:
-            conn.close()
+            self._release_connection(conn)
 
     def get_random_recommendations(
         self, n: int = 10, min_years_old: int = 0
@@ -463,8 +529,6 @@ class MovieRecommender:
             cursor = conn.cursor()
 
             # Calculate max year
-            import datetime
-
             current_year = datetime.date.today().year
             max_year = current_year - min_years_old
 
@@ -499,18 +563,34 @@ class MovieRecommender:
 
             return pd.DataFrame(results)
         finally:
-            conn.close()
-
-    def get_movie_info(self, movie_id: int) -> dict:
-        """
-        Get information about a specific movie from the database.
+            self._release_connection(conn)
+
+    def _movie_entry_from_row(self, row: tuple) -> tuple[dict, MovieInfo]:
+        """Build and cache the (info, MovieInfo) pair for a movies table row."""
+        info = {
+            "movieId": row[0],
+            "title": row[1],
+            "year": row[2],
+            "genres": self._format_genres(row[3]),
+            "decade": self._calculate_decade(row[2]),
+        }
+        # Trusted DB data; skip validation
+        model = MovieInfo.model_construct(
+            movie_id=int(row[0]),
+            title=str(info["title"] or "Unknown"),
+            genres=info["genres"],
+            decade=info["decade"] or None,
+        )
+        entry = (info, model)
+        self._movie_info_cache.set(row[0], entry)
+        return entry
 
-        Args:
-            movie_id: MovieLens movieId
+    def _lookup_movie(self, movie_id: int) -> Optional[tuple[dict, MovieInfo]]:
+        """Return a movie's cached (info, model) pair, loading it on a miss."""
+        cached = self._movie_info_cache.get(movie_id)
+        if cached is not None:
+            return cached
 
-        Returns:
-            Dictionary with movie information
-        """
         conn = self._get_connection()
         try:
             cursor = conn.cursor()
@@ -526,19 +606,84 @@ class MovieRecommender:
 
             row = cursor.fetchone()
             cursor.close()
+        finally:
+            self._release_connection(conn)
+
+        return self._movie_entry_from_row(row) if row else None
 
-            if row:
-                return {
-                    "movieId": row[0],
-                    "title": row[1],
-                    "year": row[2],
-                    "genres": self._format_genres(row[3]),
-                    "decade": self._calculate_decade(row[2]),
-                }
+    def get_movie_info(self, movie_id: int) -> dict:
+        """
+        Get information about a specific movie, from cache or the database.
 
+        Args:
+            movie_id: MovieLens movieId
+
+        Returns:
+            Dictionary with movie information
+        """
+        entry = self._lookup_movie(movie_id)
+        if entry is None:
             return {"error": f"Movie {movie_id} not found"}
-        finally:
-            conn.close()
+        return entry[0]
+
+    def get_movie_info_model(self, movie_id: int) -> Optional[MovieInfo]:
+        """
+        Get the prebuilt MovieInfo response model for a movie.
+
+        Args:
+            movie_id: MovieLens movieId
+
+        Returns:
+            Cached MovieInfo, or None if the movie doesn't exist
+        """
+        entry = self._lookup_movie(movie_id)
+        return entry[1] if entry is not None else None
+
+    def get_movie_infos(self, movie_ids: list[int]) -> pd.DataFrame:
+        """
+        Get information about several movies with a single database query.
+
+        Args:
+            movie_ids: MovieLens movieIds
+
+        Returns:
+            DataFrame with one row per found movie, in the order requested.
+            Unknown ids are skipped.
+        """
+        if not movie_ids:
+            return pd.DataFrame()
+
+        # Only hit the database for movies not cached yet
+        found: dict[int, dict] = {}
+        missing: list[int] = []
+        for mid in movie_ids:
+            cached = self._movie_info_cache.get(mid)
+            if cached is not None:
+                found[mid] = cached[0]
+            else:
+                missing.append(mid)
+
+        if missing:
+            conn = self._get_connection()
+            try:
+                cursor = conn.cursor()
+
+                cursor.execute(
+                    """
+                    SELECT id, title, year, genres
+                    FROM movies
+                    WHERE id = ANY(%s);
+                """,
+                    (missing,),
+                )
+
+                for row in cursor.fetchall():
+                    found[row[0]] = self._movie_entry_from_row(row)[0]
+                cursor.close()
+            finally:
+                self._release_connection(conn)
+
+        return pd.DataFrame([found[mid] for mid in movie_ids if mid in found])
 
     def search_movies(
         self, query: str, limit: int = 10, min_years_old: int = 0
@@ -559,8 +704,6 @@ class MovieRecommender:
             cursor = conn.cursor()
 
             # Calculate max year
-            import datetime
-
             current_year = datetime.date.today().year
             max_year = current_year - min_years_old
 
@@ -591,7 +734,7 @@ class MovieRecommender:
 
             return pd.DataFrame(results)
         finally:
-            conn.close()
+            self._release_connection(conn)
 
 
 # Example usage
@@ -610,11 +753,11 @@ if __name__ == "__main__":
         print(search_results)
 
         # Example: User likes Toy Story (1), Jumanji (2), and The Lion King (364)
-        liked_movies = [{"movieId": 1}, {"movieId": 2}, {"movieId": 364}]
+        liked_movies = [1, 2, 364]
 
         print("\nUser liked movies:")
         for mid in liked_movies:
-            info = recommender.get_movie_info(mid["movieId"])
+            info = recommender.get_movie_info(mid)
             print(f"  - {info.get('title', 'Unknown')}")
 
         print("\nGenerating recommendations...")
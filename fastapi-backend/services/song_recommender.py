@@ -17,23 +17,21 @@ Usage:
 
 import ast
 import os
-from pathlib import Path
-from typing import Any, Optional, cast
+from typing import Any, Optional, TypedDict, cast
 
 import joblib
 import numpy as np
 import pandas as pd
 import psycopg2
-from dotenv import load_dotenv
 from sklearn.feature_extraction.text import TfidfVectorizer
 from sklearn.preprocessing import OneHotEncoder, StandardScaler
 
-# Paths (services/ -> fastapi-backend/ -> project_root/)
-PROJECT_ROOT = Path(__file__).parent.parent.parent
-ENV_FILE = PROJECT_ROOT / ".env"
+from core.cache import TTLCache
+from core.db import get_db_connection, put_db_connection
+from core.env import load_env
 
 # Load environment variables
-load_dotenv(ENV_FILE)
+load_env()
 
 # Database configuration
 DATABASE_URL = os.getenv(
@@ -59,6 +57,75 @@ AUDIO_FEATURES = [
 TARGET_DIM = 128
 
 
+# hnsw.ef_search bounds; pgvector caps it at 1000
+EF_SEARCH_MIN = 40
+EF_SEARCH_MAX = 1000
+
+
+def clamp_ef_search(candidates: int, ef_search: Optional[int] = None) -> int:
+    """
+    Pick the HNSW ef_search for a vector search returning `candidates` rows.
+
+    Args:
+        candidates: LIMIT of the vector search
+        ef_search: Caller override, used in place of 2 * candidates
+
+    Returns:
+        ef_search clamped to [EF_SEARCH_MIN, EF_SEARCH_MAX]
+    """
+    requested = ef_search if ef_search is not None else 2 * candidates
+    return max(EF_SEARCH_MIN, min(requested, EF_SEARCH_MAX))
+
+
+class SongInfoRecord(TypedDict):
+    """
+    A songs row as returned by get_song_info / get_songs_info.
+
+    Types follow the songs table: id and name are NOT NULL text, so callers
+    can use them without casting. artists is jsonb (a list of names).
+    """
+
+    id: str
+    name: str
+    artists: Any
+    genre: Optional[str]
+    year: Optional[int]
+    danceability: Optional[float]
+    energy: Optional[float]
+    key: Optional[int]
+    loudness: Optional[float]
+    mode: Optional[int]
+    speechiness: Optional[float]
+    acousticness: Optional[float]
+    instrumentalness: Optional[float]
+    liveness: Optional[float]
+    valence: Optional[float]
+    tempo: Optional[float]
+    niche_genres: Any
+
+
+# Columns returned by get_song_info / get_songs_info, in SELECT order
+SONG_INFO_COLUMNS = (
+    "id",
+    "name",
+    "artists",
+    "genre",
+    "year",
+    "danceability",
+    "energy",
+    "key",
+    "loudness",
+    "mode",
+    "speechiness",
+    "acousticness",
+    "instrumentalness",
+    "liveness",
+    "valence",
+    "tempo",
+    "niche_genres",
+)
+
+
 class SongRecommender:
     """
     Song recommender using content-based filtering with pgvector.
@@ -84,6 +151,10 @@ class SongRecommender:
         # Database connection (no longer persistent)
         # self._conn: Optional[psycopg2.extensions.connection] = None
 
+        # spotify_id -> song info. Popular songs are looked up over and over
+        # (detail pages, seeds); the TTL bounds staleness after catalog edits.
+        self._song_info_cache = TTLCache(maxsize=10_000, ttl=3600)
+
         # Load transformers
         repo_id = os.getenv("HF_REPO_ID")
 
@@ -119,11 +190,25 @@ class SongRecommender:
             raise
 
     def _get_connection(self) -> psycopg2.extensions.connection:
-        """Get a new database connection."""
+        """
+        Check out a database connection. Return it with _release_connection().
+
+        Connections to the default database come from the shared pool in
+        core.db; a custom database_url gets a dedicated connection.
+        """
+        if self.database_url == DATABASE_URL:
+            return get_db_connection()
         return psycopg2.connect(self.database_url)
 
+    def _release_connection(self, conn: psycopg2.extensions.connection) -> None:
+        """Return a connection from _get_connection() to the pool, or close it."""
+        if self.database_url == DATABASE_URL:
+            put_db_connection(conn)
+        else:
+            conn.close()
+
     def close(self) -> None:
-        """Close the database connection (No-op as we use per-request connections)."""
+        """Close the database connection (No-op; the pool is closed on shutdown)."""
         pass
 
     def _create_embedding(self, song_data: dict) -> np.ndarray:
@@ -191,7 +276,7 @@ class SongRecommender:
 
         return vector.flatten().astype(np.float32)
 
-    def get_song_info(self, spotify_id: str) -> Optional[dict]:
+    def get_song_info(self, spotify_id: str) -> Optional[SongInfoRecord]:
         """
         Get information about a specific song from the database.
 
@@ -201,52 +286,58 @@ class SongRecommender:
         Returns:
             Dictionary with song information or None if not found
         """
+        return self.get_songs_info([spotify_id]).get(spotify_id)
+
+    def get_songs_info(self, spotify_ids: list[str]) -> dict[str, SongInfoRecord]:
+        """
+        Get information about several songs in one query.
+
+        Args:
+            spotify_ids: Spotify IDs of the songs
+
+        Returns:
+            Dictionary mapping each found Spotify ID to its song information
+            (same keys as get_song_info). Unknown IDs are absent. The dicts
+            are shared with the cache and must not be mutated.
+        """
+        found: dict[str, SongInfoRecord] = {}
+        missing: list[str] = []
+        for spotify_id in spotify_ids:
+            info = self._song_info_cache.get(spotify_id)
+            if info is not None:
+                found[spotify_id] = info
+            else:
+                missing.append(spotify_id)
+        if not missing:
+            return found
+
         conn = self._get_connection()
         cursor = conn.cursor()
 
         try:
             cursor.execute(
-                """
-                SELECT id, name, artists, genre, year, danceability, energy, 
-                       key, loudness, mode, speechiness, acousticness,
-                       instrumentalness, liveness, valence, tempo, niche_genres
+                f"""
+                SELECT {", ".join(SONG_INFO_COLUMNS)}
                 FROM songs
-                WHERE id = %s;
+                WHERE id = ANY(%s);
             """,
-                (spotify_id,),
+                (missing,),
             )
 
-            row = cursor.fetchone()
-
-            if row:
-                return {
-                    "id": row[0],
-                    "name": row[1],
-                    "artists": row[2],
-                    "genre": row[3],
-                    "year": row[4],
-                    "danceability": row[5],
-                    "energy": row[6],
-                    "key": row[7],
-                    "loudness": row[8],
-                    "mode": row[9],
-                    "speechiness": row[10],
-                    "acousticness": row[11],
-                    "instrumentalness": row[12],
-                    "liveness": row[13],
-                    "valence": row[14],
-                    "tempo": row[15],
-                    "niche_genres": row[16],
-                }
-            return None
+            for row in cursor.fetchall():
+                info = cast(SongInfoRecord, dict(zip(SONG_INFO_COLUMNS, row)))
+                self._song_info_cache.set(row[0], info)
+                found[row[0]] = info
+            return found
         finally:
             cursor.close()
-            conn.close()
+            self._release_connection(conn)
 
     def recommend_by_id(
         self,
         spotify_id: str,
         n_recommendations: int = 10,
+        ef_search: Optional[int] = None,
     ) -> pd.DataFrame:
         """
         Get recommendations for a song that exists in the database.
@@ -255,43 +346,94 @@ class SongRecommender:
         Args:
             spotify_id: Spotify ID of the query song
             n_recommendations: Number of recommendations
+            ef_search: Optional HNSW ef_search override (clamped)
 
         Returns:
             DataFrame with recommended songs
         """
+        return pd.DataFrame(
+            self.recommend_by_id_records(spotify_id, n_recommendations, ef_search)
+        )
+
+    def recommend_by_id_records(
+        self,
+        spotify_id: str,
+        n_recommendations: int = 10,
+        ef_search: Optional[int] = None,
+    ) -> list[dict]:
+        """
+        Same as recommend_by_id, as plain dicts for callers that only iterate.
+
+        Args:
+            spotify_id: Spotify ID of the query song
+            n_recommendations: Number of recommendations
+            ef_search: Optional HNSW ef_search override (clamped)
+
+        Returns:
+            One dict per recommended song (spotify_id, name, artists, genre,
+            year, similarity), best first. Empty genres are None.
+        """
+        return self.recommend_by_id_with_seed(spotify_id, n_recommendations, ef_search)[
+            1
+        ]
+
+    def recommend_by_id_with_seed(
+        self,
+        spotify_id: str,
+        n_recommendations: int = 10,
+        ef_search: Optional[int] = None,
+    ) -> tuple[Optional[dict], list[dict]]:
+        """
+        Look up a song and its recommendations in one round trip.
+
+        The seed's embedding is read inside the vector search's subquery, and
+        the seed row is returned alongside its neighbours.
+
+        Args:
+            spotify_id: Spotify ID of the query song
+            n_recommendations: Number of recommendations
+            ef_search: Optional HNSW ef_search override (clamped)
+
+        Returns:
+            Tuple of (seed, recommendations). seed has id, name, artists,
+            genre and year, or is None if the song is unknown. recommendations
+            are as returned by recommend_by_id_records; empty when the song
+            has no embedding.
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
 
-        try:
-            # Get the query embedding once
-            cursor.execute(
-                "SELECT embedding FROM song_vectors WHERE spotify_id = %s",
-                (spotify_id,),
-            )
-            row = cursor.fetchone()
-            if not row:
-                return pd.DataFrame()
+        fetch_limit = n_recommendations * 50
 
-            query_embedding = row[0]
-            if isinstance(query_embedding, str):
-                embedding_str = query_embedding
-            else:
-                emb_list = list(query_embedding)
-                embedding_str = "[" + ",".join(str(x) for x in emb_list) + "]"
-
-            # Query similar songs using pgvector with duplicate filtering
-            # Two-step approach: first vector search (uses HNSW index), then dedup
+        try:
+            # Size the HNSW candidate list to this request; SET LOCAL ends
+            # with the transaction, so pooled connections don't keep it.
+            # Sent in the same execute as the query: one round trip.
+            # The seed embedding is a scalar subquery, which pgvector still
+            # serves from the HNSW index.
             cursor.execute(
                 """
-                WITH vector_results AS (
-                    SELECT spotify_id, embedding <=> %s::vector as distance
+                SET LOCAL hnsw.ef_search = %s;
+                WITH seed AS (
+                    SELECT id, name, artists, genre, year
+                    FROM songs
+                    WHERE id = %s
+                ),
+                query_vector AS (
+                    SELECT embedding FROM song_vectors WHERE spotify_id = %s
+                ),
+                vector_results AS (
+                    SELECT
+                        spotify_id,
+                        embedding <=> (SELECT embedding FROM query_vector) as distance
                     FROM song_vectors
                     WHERE spotify_id != %s
-                    ORDER BY embedding <=> %s::vector
+                      AND EXISTS (SELECT 1 FROM query_vector)
+                    ORDER BY embedding <=> (SELECT embedding FROM query_vector)
                     LIMIT %s
                 ),
                 ranked_songs AS (
-                    SELECT 
+                    SELECT
                         s.id, s.name, s.artists, s.genre, s.year,
                         1 - (vr.distance) as similarity,
                         ROW_NUMBER() OVER (
@@ -300,43 +442,57 @@ class SongRecommender:
                         ) as rn
                     FROM vector_results vr
                     JOIN songs s ON vr.spotify_id = s.id
+                ),
+                neighbours AS (
+                    SELECT id, name, artists, genre, year, similarity
+                    FROM ranked_songs
+                    WHERE rn = 1
+                    ORDER BY similarity DESC
+                    LIMIT %s
                 )
-                SELECT id, name, artists, genre, year, similarity
-                FROM ranked_songs
-                WHERE rn = 1
-                ORDER BY similarity DESC
-                LIMIT %s;
+                SELECT TRUE AS is_seed, id, name, artists, genre, year,
+                       NULL::float8 AS similarity
+                FROM seed
+                UNION ALL
+                SELECT FALSE, id, name, artists, genre, year, similarity
+                FROM neighbours
+                ORDER BY is_seed DESC, similarity DESC;
             """,
                 (
-                    embedding_str,
+                    str(clamp_ef_search(fetch_limit, ef_search)),
                     spotify_id,
-                    embedding_str,
-                    n_recommendations * 50,
+                    spotify_id,
+                    spotify_id,
+                    fetch_limit,
                     n_recommendations,
                 ),
             )
 
-            rows = cursor.fetchall()
-
-            results = []
-            for row in rows:
-                results.append(
+            seed = None
+            recommendations = []
+            for row in cursor.fetchall():
+                if row[0]:
+                    seed = dict(
+                        zip(("id", "name", "artists", "genre", "year"), row[1:6])
+                    )
+                    continue
+                recommendations.append(
                     {
-                        "spotify_id": row[0],
-                        "name": row[1],
-                        "artists": row[2],
-                        "genre": row[3],
-                        "year": row[4],
-                        "similarity": float(row[5]) if row[5] else 0.0,
+                        "spotify_id": row[1],
+                        "name": row[2],
+                        "artists": row[3],
+                        "genre": row[4] or None,
+                        "year": row[5],
+                        "similarity": float(row[6]) if row[6] else 0.0,
                     }
                 )
-
-            return pd.DataFrame(results)
+            return seed, recommendations
         except Exception:
             conn.rollback()
             raise
         finally:
             cursor.close()
+            self._release_connection(conn)
 
     def recommend(
         self,
@@ -344,6 +500,7 @@ class SongRecommender:
         n_recommendations: int = 10,
         exclude_liked: bool = True,
         min_years_old: int = 10,
+        ef_search: Optional[int] = None,
     ) -> pd.DataFrame:
         """
         Get recommendations based on a list of songs the user likes,
@@ -354,6 +511,7 @@ class SongRecommender:
                          (timestamp is optional, defaults to now)
             n_recommendations: Number of recommendations
             exclude_liked: Whether to exclude liked songs from results
+            ef_search: Optional HNSW ef_search override (clamped)
 
         Returns:
             DataFrame with recommended songs
@@ -454,16 +612,12 @@ class SongRecommender:
 
             max_year = datetime.datetime.now().year - min_years_old
 
-            # Prepare placeholders for NOT IN clause
+            # Liked ids excluded from the vector search
             liked_ids = [
                 item["spotify_id"]
                 for item in liked_items
                 if item["spotify_id"] in id_to_embedding
             ]
-            placeholders_str = ",".join(["%s"] * len(liked_ids))
-
-            if not placeholders_str:
-                placeholders_str = "''"  # Handle empty case safely
 
             # Fetch 50x candidates to account for year filtering (Hybrid Search issue)
             # Vector index finds nearest neighbors (mostly recent), so we need to fetch MANY
@@ -471,20 +625,26 @@ class SongRecommender:
             fetch_limit = n_recommendations * 50
 
             # Optimize vector search parameters for filtered search (Recall vs Speed)
-            # We need VERY aggressive search because most neighbors are recent (filtered out)
-            # Max value for hnsw.ef_search is 1000
+            # ef_search scales with the candidate count (capped at 1000); SET
+            # LOCAL ends with the transaction, so pooled connections don't keep it
             # Note: CockroachDB requires these values to be strings
-            cursor.execute("SET hnsw.ef_search = '1000'")
-            cursor.execute("SET ivfflat.probes = '50'")
+            cursor.execute(
+                "SET LOCAL hnsw.ef_search = %s",
+                (str(clamp_ef_search(fetch_limit, ef_search)),),
+            )
+            cursor.execute("SET LOCAL ivfflat.probes = '50'")
 
             cursor.execute(
-                f"""
+                """
                 -- Step 1: Vector search on song_vectors (uses HNSW index - ~500 rows)
                 -- Step 2: Join with songs and apply filters (now on small result set)
                 -- Step 3: Deduplicate (now on small result set)
+                -- Liked songs are excluded inside the vector search so they
+                -- don't use up its LIMIT
                 WITH vector_results AS (
                     SELECT spotify_id, embedding <=> %s::vector as distance
                     FROM song_vectors
+                    WHERE spotify_id <> ALL(%s)
                     ORDER BY embedding <=> %s::vector
                     LIMIT %s
                 ),
@@ -498,8 +658,7 @@ class SongRecommender:
                         ) as rn
                     FROM vector_results vr
                     JOIN songs s ON vr.spotify_id = s.id
-                    WHERE vr.spotify_id NOT IN ({placeholders_str})
-                      AND s.year IS NOT NULL
+                    WHERE s.year IS NOT NULL
                       AND s.year <= %s
                 )
                 SELECT id, name, artists, genre, year, popularity, similarity
@@ -508,9 +667,14 @@ class SongRecommender:
                 ORDER BY similarity DESC
                 LIMIT %s;
             """,
-                [embedding_str, embedding_str, fetch_limit]
-                + liked_ids
-                + [max_year, n_recommendations],
+                (
+                    embedding_str,
+                    liked_ids,
+                    embedding_str,
+                    fetch_limit,
+                    max_year,
+                    n_recommendations,
+                ),
             )
 
             rows = cursor.fetchall()
@@ -593,7 +757,7 @@ class SongRecommender:
             raise e
         finally:
             cursor.close()
-            conn.close()
+            self._release_connection(conn)
 
     def get_random_recommendations(
         self, n: int = 10, min_years_old: int = 10
@@ -617,13 +781,16 @@ class SongRecommender:
 
             max_year = datetime.datetime.now().year - min_years_old
 
-            cursor.execute(f"""
-                SELECT id, name, artists, genre, year 
-                FROM songs 
-                WHERE year <= {max_year}
-                ORDER BY RANDOM() 
-                LIMIT {n}
-            """)
+            cursor.execute(
+                """
+                SELECT id, name, artists, genre, year
+                FROM songs
+                WHERE year <= %s
+                ORDER BY RANDOM()
+                LIMIT %s
+            """,
+                (max_year, n),
+            )
             rows = cursor.fetchall()
             return pd.DataFrame(
                 [
@@ -641,7 +808,7 @@ class SongRecommender:
             )
         finally:
             cursor.close()
-            conn.close()
+            self._release_connection(conn)
 
     def search_songs(
         self, query: str, limit: int = 10, min_years_old: int = 0
@@ -657,6 +824,23 @@ class SongRecommender:
         Returns:
             DataFrame with matching songs
         """
+        return pd.DataFrame(self.search_songs_records(query, limit, min_years_old))
+
+    def search_songs_records(
+        self, query: str, limit: int = 10, min_years_old: int = 0
+    ) -> list[dict]:
+        """
+        Same as search_songs, as plain dicts for callers that only iterate.
+
+        Args:
+            query: Search query (case-insensitive)
+            limit: Maximum number of results
+            min_years_old: Minimum age of song in years
+
+        Returns:
+            One dict per matching song (spotify_id, name, artists, genre,
+            year). Empty genres are None.
+        """
         conn = self._get_connection()
         cursor = conn.cursor()
 
@@ -678,26 +862,22 @@ class SongRecommender:
                 (f"%{query.lower()}%", f"%{query.lower()}%", max_year, limit),
             )
 
-            rows = cursor.fetchall()
-
-            results = []
-            for row in rows:
-                results.append(
-                    {
-                        "spotify_id": row[0],
-                        "name": row[1],
-                        "artists": row[2],
-                        "genre": row[3],
-                        "year": row[4],
-                    }
-                )
-
-            return pd.DataFrame(results)
+            return [
+                {
+                    "spotify_id": row[0],
+                    "name": row[1],
+                    "artists": row[2],
+                    "genre": row[3] or None,
+                    "year": row[4],
+                }
+                for row in cursor.fetchall()
+            ]
         except Exception:
             conn.rollback()
             raise
         finally:
             cursor.close()
+            self._release_connection(conn)
 
 
 # Example usage
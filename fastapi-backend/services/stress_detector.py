@@ -52,9 +52,21 @@ class StressDetector:
         Returns:
             Stress score between 0 (no stress) and 1 (high stress).
         """
-        # Tokenize input
+        return self.predict_batch([text])[0]
+
+    def predict_batch(self, texts: list[str]) -> list[float]:
+        """
+        Predict stress levels for several texts in one forward pass.
+
+        Args:
+            texts: Input texts to analyze.
+
+        Returns:
+            Stress scores between 0 and 1, in the order of texts.
+        """
+        # Tokenize input (padded to the longest text in the batch)
         inputs = self.tokenizer(
-            text,
+            texts,
             return_tensors="pt",
             truncation=True,
             max_length=512,
@@ -74,9 +86,7 @@ class StressDetector:
 
         # Assuming label 1 is "stressed" and label 0 is "not stressed"
         # Return the probability of the "stressed" class
-        stress_score = probabilities[0, 1].item()
-
-        return stress_score
+        return probabilities[:, 1].tolist()
 
     def close(self) -> None:
         """Clean up resources."""
@@ -0,0 +1,87 @@
+import asyncio
+import sys
+from pathlib import Path
+
+# Add parent directory (fastapi-backend) to path so we can import the backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.batcher import AsyncBatcher
+
+
+class RecordingPredictor:
+    """predict_batch stand-in that records each batch it is called with."""
+
+    def __init__(self, fail: bool = False) -> None:
+        self.calls: list[list[str]] = []
+        self.fail = fail
+
+    def __call__(self, texts: list[str]) -> list[str]:
+        self.calls.append(list(texts))
+        if self.fail:
+            raise ValueError("model failed")
+        return [text.upper() for text in texts]
+
+
+def test_concurrent_submits_coalesce_in_order():
+    """Texts submitted within the window are scored in one ordered call."""
+    predictor = RecordingPredictor()
+
+    async def run() -> list[str]:
+        batcher = AsyncBatcher(predictor, max_wait_ms=50, max_batch=32)
+        return await asyncio.gather(*(batcher.submit(f"t{i}") for i in range(5)))
+
+    results = asyncio.run(run())
+    assert predictor.calls == [["t0", "t1", "t2", "t3", "t4"]]
+    assert results == ["T0", "T1", "T2", "T3", "T4"]
+
+
+def test_flushes_at_max_batch():
+    """A full batch is scored at once instead of waiting out the window."""
+    predictor = RecordingPredictor()
+
+    async def run() -> list[str]:
+        # The window alone would never flush within the timeout
+        batcher = AsyncBatcher(predictor, max_wait_ms=60_000, max_batch=3)
+        return await asyncio.wait_for(
+            asyncio.gather(*(batcher.submit(f"t{i}") for i in range(3))),
+            timeout=5,
+        )
+
+    assert asyncio.run(run()) == ["T0", "T1", "T2"]
+    assert predictor.calls == [["t0", "t1", "t2"]]
+
+
+def test_overflow_goes_to_next_batch():
+    """Texts past max_batch start a new batch flushed by the window."""
+    predictor = RecordingPredictor()
+
+    async def run() -> list[str]:
+        batcher = AsyncBatcher(predictor, max_wait_ms=20, max_batch=3)
+        return await asyncio.gather(*(batcher.submit(f"t{i}") for i in range(5)))
+
+    assert asyncio.run(run()) == ["T0", "T1", "T2", "T3", "T4"]
+    assert predictor.calls == [["t0", "t1", "t2"], ["t3", "t4"]]
+
+
+def test_batch_exception_reaches_every_waiter():
+    """A failing batch raises the same exception in every submitter."""
+    predictor = RecordingPredictor(fail=True)
+
+    async def run() -> list:
+        batcher = AsyncBatcher(predictor, max_wait_ms=20, max_batch=32)
+        return await asyncio.gather(
+            *(batcher.submit(f"t{i}") for i in range(3)), return_exceptions=True
+        )
+
+    results = asyncio.run(run())
+    assert len(predictor.calls) == 1
+    assert all(isinstance(r, ValueError) for r in results)
+    assert results[0] is results[1] is results[2]
+
+
+if __name__ == "__main__":
+    test_concurrent_submits_coalesce_in_order()
+    test_flushes_at_max_batch()
+    test_overflow_goes_to_next_batch()
+    test_batch_exception_reaches_every_waiter()
+    print("✅ All batcher tests passed.")
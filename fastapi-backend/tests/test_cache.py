@@ -0,0 +1,92 @@
+import sys
+from pathlib import Path
+from unittest import mock
+
+# Add parent directory (fastapi-backend) to path so we can import the backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.cache import TTLCache
+
+
+class FakeClock:
+    """Controllable stand-in for time.monotonic."""
+
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def test_entries_expire_after_ttl():
+    clock = FakeClock()
+    with mock.patch("core.cache.time.monotonic", clock):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+
+        clock.now += 59
+        assert cache.get("a") == 1
+
+        clock.now += 2
+        assert cache.get("a") is None
+        # Expired entries are purged on access
+        assert len(cache) == 0
+
+
+def test_set_refreshes_ttl():
+    clock = FakeClock()
+    with mock.patch("core.cache.time.monotonic", clock):
+        cache = TTLCache(maxsize=10, ttl=60)
+        cache.set("a", 1)
+        clock.now += 50
+        cache.set("a", 2)
+        clock.now += 50
+        assert cache.get("a") == 2
+
+
+def test_evicts_oldest_insert_when_full():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    # Reads don't change the eviction order
+    assert cache.get("a") == 1
+    cache.set("c", 3)
+
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+    assert cache.get("c") == 3
+    assert len(cache) == 2
+
+
+def test_reset_moves_key_to_newest():
+    cache = TTLCache(maxsize=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.set("a", 10)
+    cache.set("c", 3)
+
+    assert cache.get("a") == 10
+    assert cache.get("b") is None
+
+
+def test_pop_and_clear():
+    cache = TTLCache(maxsize=10, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+
+    cache.pop("a")
+    cache.pop("missing")
+    assert cache.get("a") is None
+    assert cache.get("b") == 2
+
+    cache.clear()
+    assert len(cache) == 0
+
+
+if __name__ == "__main__":
+    test_entries_expire_after_ttl()
+    test_set_refreshes_ttl()
+    test_evicts_oldest_insert_when_full()
+    test_reset_moves_key_to_newest()
+    test_pop_and_clear()
+    print("✅ All cache tests passed.")
@@ -0,0 +1,189 @@
+import io
+import sys
+from pathlib import Path
+
+import joblib
+import numpy as np
+
+# Add parent directory (fastapi-backend) to path so we can import the backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from services.contextual_bandit import (
+    PAYLOAD_MAGIC,
+    LinUCBBandit,
+    build_context_features,
+)
+
+EMOTIONS = ["anger", "fear", "joy", "love", "neutral", "sadness", "surprise"]
+SONG_GENRES = ["pop", "rock", "hip hop", "r&b", "country", "jazz"]
+
+
+def _history(n: int, seed: int = 0) -> list[tuple[np.ndarray, dict, float]]:
+    """Random (context, candidate, reward) rows over the song arms."""
+    rng = np.random.default_rng(seed)
+    rows = []
+    for _ in range(n):
+        context = build_context_features(
+            stress_score=float(rng.random()),
+            emotion=EMOTIONS[rng.integers(len(EMOTIONS))],
+            birth_year=int(rng.integers(1960, 2010)),
+            user_positive_rate=float(rng.random()),
+        )
+        candidate = {"type": "song", "genre": SONG_GENRES[rng.integers(6)]}
+        rows.append((context, candidate, float(rng.random())))
+    return rows
+
+
+def _trained_bandit(n: int = 200) -> LinUCBBandit:
+    bandit = LinUCBBandit()
+    for context, candidate, reward in _history(n):
+        bandit.update(context, candidate, reward)
+    return bandit
+
+
+def _query_context() -> np.ndarray:
+    return build_context_features(0.4, "joy", 1985, 0.6)
+
+
+def test_framed_round_trip():
+    """serialize() -> deserialize() restores the exact model state."""
+    bandit = _trained_bandit()
+    data = bandit.serialize()
+    assert data.startswith(PAYLOAD_MAGIC)
+
+    loaded = LinUCBBandit.deserialize(data)
+    assert loaded.arms == bandit.arms
+    assert loaded.alpha == bandit.alpha
+    assert loaded.context_dim == bandit.context_dim
+    assert loaded.l2_lambda == bandit.l2_lambda
+    assert loaded.n_updates == bandit.n_updates
+    assert loaded._is_fitted == bandit._is_fitted
+    np.testing.assert_array_equal(loaded._A_inv, bandit._A_inv)
+    np.testing.assert_array_equal(loaded._b, bandit._b)
+    np.testing.assert_array_equal(loaded._theta, bandit._theta)
+
+    x = _query_context()
+    assert loaded.predict_expectations(x) == bandit.predict_expectations(x)
+
+    # Loaded arrays must be writable so the model keeps learning
+    context, candidate, reward = _history(1, seed=1)[0]
+    loaded.update(context, candidate, reward)
+    assert loaded.n_updates == bandit.n_updates + 1
+
+
+def test_unfitted_round_trip():
+    """A fresh model round-trips to the prior."""
+    loaded = LinUCBBandit.deserialize(LinUCBBandit().serialize())
+    assert not loaded._is_fitted
+    np.testing.assert_array_equal(loaded._A_inv, LinUCBBandit()._A_inv)
+
+
+def test_legacy_stacked_joblib_payload():
+    """joblib payloads holding the stacked float64 arrays still load."""
+    bandit = _trained_bandit()
+    buffer = io.BytesIO()
+    joblib.dump(
+        {
+            "arms": bandit.arms,
+            "alpha": bandit.alpha,
+            "context_dim": bandit.context_dim,
+            "n_updates": bandit.n_updates,
+            "is_fitted": True,
+            "l2_lambda": bandit.l2_lambda,
+            "A_inv": bandit._A_inv.astype(np.float64),
+            "b": bandit._b.astype(np.float64),
+            "theta": bandit._theta.astype(np.float64),
+        },
+        buffer,
+    )
+
+    loaded = LinUCBBandit.deserialize(buffer.getvalue())
+    assert loaded._A_inv.dtype == bandit._A_inv.dtype
+    x = _query_context()
+    assert loaded.predict_expectations(x) == bandit.predict_expectations(x)
+
+
+def test_legacy_mabwiser_payload():
+    """Baseline payloads pickling a fitted MABWiser LinUCB load with its scores."""
+    from mabwiser.mab import MAB, LearningPolicy
+
+    bandit = LinUCBBandit()
+    mab = MAB(arms=bandit.arms, learning_policy=LearningPolicy.LinUCB(alpha=1.0))
+    rows = _history(200)
+    decisions = [bandit._get_arm_from_candidate(c) for _, c, _ in rows]
+    mab.fit(
+        decisions,
+        [r for _, _, r in rows],
+        np.vstack([c for c, _, _ in rows]).astype(np.float64),
+    )
+
+    buffer = io.BytesIO()
+    joblib.dump(
+        {
+            "arms": bandit.arms,
+            "alpha": 1.0,
+            "context_dim": bandit.context_dim,
+            "n_updates": len(rows),
+            "is_fitted": True,
+            "mab": mab,
+        },
+        buffer,
+    )
+
+    loaded = LinUCBBandit.deserialize(buffer.getvalue())
+    assert loaded.n_updates == len(rows)
+    x = _query_context()
+    expected = mab.predict_expectations(x.reshape(1, -1).astype(np.float64))
+    scores = loaded.predict_expectations(x)
+    for arm in bandit.arms:
+        assert abs(scores[arm] - expected[arm]) < 1e-5
+
+
+def test_batch_fit_matches_sequential_updates():
+    """One fit_pending() over buffered rows equals per-row update()."""
+    rows = _history(300)
+    sequential = LinUCBBandit()
+    batched = LinUCBBandit()
+    for context, candidate, reward in rows:
+        sequential.update(context, candidate, reward)
+        batched.record(context, candidate, reward)
+    batched.fit_pending()
+
+    assert batched.n_updates == sequential.n_updates == len(rows)
+    np.testing.assert_allclose(batched._A_inv, sequential._A_inv, atol=1e-6)
+    np.testing.assert_allclose(batched._b, sequential._b, rtol=1e-5)
+    np.testing.assert_allclose(batched._theta, sequential._theta, atol=1e-5)
+
+
+def test_arm_scores_match_ucb_formula():
+    """_arm_scores equals x.theta + alpha * sqrt(x^T A^-1 x) from scratch."""
+    rows = _history(300)
+    bandit = LinUCBBandit(alpha=1.5)
+    for context, candidate, reward in rows:
+        bandit.update(context, candidate, reward)
+
+    d = bandit.context_dim
+    x = _query_context().astype(np.float64)
+    for arm, k in bandit._arm_index.items():
+        # Ridge regression from the raw rows, in float64
+        A = bandit.l2_lambda * np.identity(d)
+        b = np.zeros(d)
+        for context, candidate, reward in rows:
+            if bandit._get_arm_from_candidate(candidate) == arm:
+                A += np.outer(context, context)
+                b += reward * context
+        A_inv = np.linalg.inv(A)
+        expected = (A_inv @ b) @ x + bandit.alpha * np.sqrt(x @ A_inv @ x)
+
+        score = bandit._arm_scores(x.astype(np.float32))[k]
+        assert abs(score - expected) < 1e-4, (arm, score, expected)
+
+
+if __name__ == "__main__":
+    test_framed_round_trip()
+    test_unfitted_round_trip()
+    test_legacy_stacked_joblib_payload()
+    test_legacy_mabwiser_payload()
+    test_batch_fit_matches_sequential_updates()
+    test_arm_scores_match_ucb_formula()
+    print("✅ All contextual bandit tests passed.")
@@ -0,0 +1,98 @@
+import asyncio
+import sys
+from pathlib import Path
+from types import SimpleNamespace
+from unittest import mock
+
+import pandas as pd
+
+# Add parent directory (fastapi-backend) to path so we can import the backend modules
+sys.path.append(str(Path(__file__).parent.parent))
+
+from core.schemas import RecommendRequest
+from routes import recommend
+
+
+class RecordingMovieRecommender:
+    """MovieRecommender stand-in that records the liked items it is given."""
+
+    def __init__(self) -> None:
+        self.liked: dict = {}
+
+    def recommend(self, liked_item_ids, timestamps, n_recommendations):
+        self.liked = dict(zip(liked_item_ids, timestamps))
+        return pd.DataFrame(
+            {
+                "movieId": [99],
+                "title": ["Back to the Future"],
+                "genres": ["Adventure|Comedy"],
+                "year": [1985],
+                "rating_count": [1000],
+                "score": [0.9],
+            }
+        )
+
+
+def _run_recommend(prefs: dict, movie_recommender) -> dict:
+    """Call POST /recommend with the DB lookups patched to return prefs."""
+    request = SimpleNamespace(
+        app=SimpleNamespace(
+            state=SimpleNamespace(
+                db_pool=object(),
+                recommenders=SimpleNamespace(
+                    movie=movie_recommender,
+                    song=None,
+                    stress=None,
+                    emotion=None,
+                    bandit=None,
+                ),
+            )
+        )
+    )
+
+    async def fake_bundle(pool, user_id):
+        return prefs, []
+
+    async def fake_context(pool, user_id):
+        return {"stress_score": 0.5, "emotion": "neutral"}
+
+    with (
+        mock.patch.object(recommend, "fetch_user_bundle", fake_bundle),
+        mock.patch.object(recommend, "fetch_latest_context", fake_context),
+    ):
+        return asyncio.run(
+            recommend.get_recommendation(request, RecommendRequest(user_id="u1"))
+        )
+
+
+def test_repeat_likes_keep_newest_timestamp():
+    """Feedback history is newest first; each movie keeps its latest like."""
+    prefs = {
+        "selected_movie_ids": [1, 2],
+        "selected_song_ids": [],
+        "birth_year": 1975,
+        "experiment_group": "treatment",
+        "nostalgic_period_start": None,
+        "nostalgic_period_end": None,
+        "feedback_history": [
+            {"type": "movie", "id": "1", "timestamp": "2024-03-01T00:00:00"},
+            {"type": "movie", "id": "3", "timestamp": "2024-02-01T00:00:00"},
+            {"type": "movie", "id": "1", "timestamp": "2023-01-01T00:00:00"},
+            {"type": "movie", "id": "3", "timestamp": "2022-01-01T00:00:00"},
+        ],
+    }
+    movies = RecordingMovieRecommender()
+    response = _run_recommend(prefs, movies)
+
+    assert response.status_code == 200
+    assert movies.liked == {
+        1: "2024-03-01T00:00:00",
+        # Onboarding pick without feedback keeps the default
+        2: None,
+        3: "2024-02-01T00:00:00",
+    }
+
+
+if __name__ == "__main__":
+    test_repeat_likes_keep_newest_timestamp()
+    print("✅ All recommend route tests passed.")
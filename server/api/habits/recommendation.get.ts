@@ -16,7 +16,8 @@ type RecommendedContent = {
 type EmotionResult = {
   emotion: string
   confidence: number
-  probabilities: Record<string, number>
+  // Scores in fixed label order: anger, fear, joy, love, neutral, sadness, surprise
+  probabilities: number[]
 }
 
 type RecommendResponse = {
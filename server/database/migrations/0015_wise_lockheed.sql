@@ -0,0 +1 @@
+CREATE INDEX "daily_habit_logs_user_date_idx" ON "daily_habit_logs" USING btree ("user_id","date" DESC NULLS FIRST,"created_at" DESC NULLS FIRST) INCLUDE ("stress_level","emotion");
@@ -0,0 +1,10 @@
+CREATE TABLE "bandit_models_bytea" (
+	"model_id" text PRIMARY KEY NOT NULL,
+	"model_data" bytea NOT NULL,
+	"n_updates" integer DEFAULT 0,
+	"updated_at" timestamp DEFAULT now() NOT NULL
+);
+--> statement-breakpoint
+INSERT INTO "bandit_models_bytea" ("model_id", "model_data", "n_updates", "updated_at") SELECT "model_id", decode("model_data", 'base64'), "n_updates", "updated_at" FROM "bandit_models";--> statement-breakpoint
+DROP TABLE "bandit_models";--> statement-breakpoint
+ALTER TABLE "bandit_models_bytea" RENAME TO "bandit_models";
@@ -1,10 +1,16 @@
-import { pgTable, text, integer, timestamp } from 'drizzle-orm/pg-core'
+import { pgTable, text, integer, timestamp, customType } from 'drizzle-orm/pg-core'
+
+// Raw binary column; the backend writes the serialized model bytes as-is
+const bytea = customType<{ data: Buffer; driverData: Buffer }>({
+  dataType() {
+    return 'bytea'
+  },
+})
 
 // Bandit models table - stores serialized bandit models (global and per-user)
-// Using text with base64 encoding for portability (bytea handling varies by driver)
 export const banditModels = pgTable('bandit_models', {
   modelId: text('model_id').primaryKey(), // 'global' or 'user_{user_id}'
-  modelData: text('model_data').notNull(), // Base64 encoded serialized model
+  modelData: bytea('model_data').notNull(), // LUCB framed blob: JSON header + zlib'd float32 arm state
   nUpdates: integer('n_updates').default(0),
   updatedAt: timestamp('updated_at').defaultNow().notNull(),
 })
@@ -46,6 +46,13 @@ export const dailyHabitLogs = pgTable(
   (table) => [
     index('daily_habit_logs_user_id_idx').on(table.userId),
     index('daily_habit_logs_date_idx').on(table.date),
+    // Serves the backend's "latest log for user" lookup as a one-row index scan.
+    // Migration 0015 adds INCLUDE (stress_level, emotion) to make it covering.
+    index('daily_habit_logs_user_date_idx').on(
+      table.userId,
+      table.date.desc().nullsFirst(),
+      table.createdAt.desc().nullsFirst()
+    ),
     unique('daily_habit_logs_user_date_unique').on(table.userId, table.date),
   ]
 )